@@ -0,0 +1,69 @@
+from random_maze import EAST, GOAL, NORTH, START, RandomMaze
+
+"""
+Hexagonal mazes in axial coordinates. A cell x, y has six neighbors, x, y - 1 to the
+north west, x + 1, y - 1 to the north east, x + 1, y to the east and the three cells
+opposite those. The grid is stored like RandomMaze, one byte per cell row after row,
+and a cell stores its north west, north east and east walls in three bits of that byte.
+The other three walls belong to the neighbors.
+
+The bordering last row and column are outside the maze just like on the square grid,
+and every step off the grid still lands on them, so the generators and solvers of
+RandomMaze work unchanged once they are given the six directions.
+"""
+
+# The third wall flag, the north west wall uses NORTH and the east wall EAST.
+NORTH_EAST = 16
+
+# Direction codes, the opposite of a direction is 5 minus the code.
+NW, E, NE, SW, W, SE = 0, 1, 2, 3, 4, 5
+
+# The generation methods that work on hex grids, the others are built around square cells.
+HEX_METHODS = ('iterative', 'recursive', 'prim', 'kruskal', 'wilson')
+
+# The rendered string for every combination of flags, '/' and '\' are the upper walls.
+HEX_CELL_STRINGS = tuple(('/' if flags & NORTH else ' ') + ('\\' if flags & NORTH_EAST else ' ')
+                         + ('G' if flags & GOAL else 'S' if flags & START else ' ')
+                         + ('|' if flags & EAST else ' ') for flags in range(32))
+
+
+class HexMaze(RandomMaze):
+
+    # The hex grid model used by the generators and solvers of RandomMaze.
+    DIRECTIONS = (NW, E, NE, SW, W, SE)
+    ALL_WALLS = NORTH | EAST | NORTH_EAST
+    BREADTH_FIRST_ORDER = (NW, SE, E, W, NE, SW)
+    DEPTH_FIRST_ORDER = (NW, SE, W, E, NE, SW)
+    _cell_strings = HEX_CELL_STRINGS
+    SUPPORTED_METHODS = HEX_METHODS
+    GRID = 'hex'
+
+    # ------------------------------------------------
+    # For every direction code the offset to the next cell,
+    # the offset to the cell that stores the wall between
+    # them and which flag the wall is.
+    # ------------------------------------------------
+    def _links(self):
+        """
+        :return: A tuple of (cell offset, wall offset, wall flag) indexed by direction code.
+        """
+        width = self.width
+        return ((-width, 0, NORTH),
+                (1, 0, EAST),
+                (1 - width, 0, NORTH_EAST),
+                (width - 1, width - 1, NORTH_EAST),
+                (-1, -1, EAST),
+                (width, width, NORTH))
+
+    # --------------------------------
+    # Prints the maze with every row shifted half a
+    # cell to the right of the row above, so each cell
+    # sits below its north west and north east neighbors.
+    # --------------------------------
+    def print_maze(self):
+        """
+        :return: None
+        """
+        for row, cells in enumerate(self.get_maze()):
+            print('  ' * row + ''.join(cells))
+        return None
@@ -0,0 +1,150 @@
+from point import Point
+from random_maze import CELL_STRINGS, EAST, NORTH, RandomMaze, np, require_numpy
+
+"""
+Three dimensional mazes made of floors stacked on top of each other, floor 0 at the
+top. The floors are stored one after another in the same flat bytearray RandomMaze
+uses, so a 200 x 200 x 200 maze is 8M bytes. A cell stores its north, east and up
+walls in one byte, its south, west and down walls belong to the neighbors.
+
+Like the bordering last row and column of every floor, the last floor is outside the
+maze. A step up from the top floor lands on it through Python's negative indexing and
+a step down from the lowest floor lands on it directly, so the generators and solvers
+of RandomMaze need no bound checks here either. Carve events count y over all floors,
+the floor is y // height.
+"""
+
+# The wall flag between a cell and the cell above it.
+UP = 16
+
+# Direction codes, the opposite of a direction is 5 minus the code.
+N, E, U, D, W, S = 0, 1, 2, 3, 4, 5
+
+# The generation methods that work on 3D grids, none of them recurse.
+METHODS_3D = ('iterative', 'prim', 'kruskal', 'wilson')
+
+# The rendered string for every combination of flags, '^' marks an open ceiling.
+CELL_STRINGS_3D = tuple(CELL_STRINGS[flags & 15] + (' ' if flags & UP else '^') for flags in range(32))
+
+
+class Maze3D(RandomMaze):
+
+    # The 3D grid model used by the generators and solvers of RandomMaze.
+    DIRECTIONS = (N, E, U, D, W, S)
+    ALL_WALLS = NORTH | EAST | UP
+    BREADTH_FIRST_ORDER = (N, S, E, W, U, D)
+    DEPTH_FIRST_ORDER = (N, S, W, E, U, D)
+    _cell_strings = CELL_STRINGS_3D
+    SUPPORTED_METHODS = METHODS_3D
+    GRID = '3D'
+
+    # ------------------------------------------------
+    # Constructor, the depth counts the bordering last
+    # floor like the width and height count the last
+    # column and row. Unlike RandomMaze the start and
+    # goal are simply at x, y, z.
+    # ------------------------------------------------
+    def __init__(self, width, height, depth, start_x=0, start_y=0, start_z=0, goal_x=0, goal_y=0, goal_z=0,
+                 seed=None):
+        super().__init__(width, height, start_x, start_y, goal_x, goal_y, seed)
+        self.depth = depth
+        self.start_z = start_z
+        self.goal_z = goal_z
+        self.walls = bytearray([self.ALL_WALLS]) * (width * height * depth)
+        self.outside = self.outside * (depth - 1) + b'\x01' * (width * height)
+
+    def get_maze(self, as_array=False):
+        """
+        :param as_array: Return a read-only NumPy view of the wall grid instead of strings.
+        :return: The maze rendered as a list of floors of rows of strings, or a (depth, height, width)
+                 uint8 array of wall flags that shares memory with the maze.
+        """
+        if as_array:
+            require_numpy("get_maze(as_array=True)")
+            view = np.frombuffer(self.walls, dtype=np.uint8).reshape(self.depth, self.height, self.width)
+            view.flags.writeable = False
+            return view
+
+        width = self.width
+        walls = self.walls
+        floor_size = width * self.height
+        return [[[CELL_STRINGS_3D[flags] for flags in walls[row:row + width]]
+                 for row in range(floor, floor + floor_size, width)]
+                for floor in range(0, floor_size * self.depth, floor_size)]
+
+    # ------------------------------------------------
+    # For every direction code the offset to the next cell,
+    # the offset to the cell that stores the wall between
+    # them and which flag the wall is.
+    # ------------------------------------------------
+    def _links(self):
+        """
+        :return: A tuple of (cell offset, wall offset, wall flag) indexed by direction code.
+        """
+        width = self.width
+        floor_size = width * self.height
+        return ((-width, 0, NORTH),
+                (1, 0, EAST),
+                (-floor_size, 0, UP),
+                (floor_size, floor_size, UP),
+                (-1, -1, EAST),
+                (width, width, NORTH))
+
+    # ------------------------------------------------
+    # Carves the passages with one of METHODS_3D, the
+    # checkpoint files only hold 2D mazes.
+    # ------------------------------------------------
+    def _carve(self, method, policy='newest', state=None):
+        """
+        :param method: One of METHODS_3D.
+        :param policy: The growing_tree policy accepted by generate_maze.
+        :param state: Always None, checkpoints only work on 2D mazes.
+        :return: None
+        """
+        if state is not None or self._checkpoint is not None:
+            raise ValueError("Checkpoints only work on 2D mazes")
+        super()._carve(method, policy, state)
+
+    # ------------------------------------------------
+    # The start and goal cells, both at their x, y, z.
+    # ------------------------------------------------
+    def _search_start(self):
+        """
+        :return: The index of the start cell.
+        """
+        return (self.start_z * self.height + self.start_y) * self.width + self.start_x
+
+    def _start_cell(self):
+        """
+        :return: The index of the start cell.
+        """
+        return self._search_start()
+
+    def _goal_cell(self):
+        """
+        :return: The index of the goal cell.
+        """
+        return (self.goal_z * self.height + self.goal_y) * self.width + self.goal_x
+
+    def _point(self, cell, parent=None):
+        """
+        :param cell: The index of the cell.
+        :param parent: The point before it on the path.
+        :return: A Point with the cell's x, y and floor.
+        """
+        floor, rest = divmod(cell, self.width * self.height)
+        y, x = divmod(rest, self.width)
+        return Point(x, y, parent, floor)
+
+    # --------------------------------
+    # Prints the maze floor by floor.
+    # --------------------------------
+    def print_maze(self):
+        """
+        :return: None
+        """
+        for floor, rows in enumerate(self.get_maze()):
+            print("Floor %d" % floor)
+            for cells in rows:
+                print(''.join(cells))
+        return None
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from random import Random
+from random_maze import CELL_STRINGS, EAST, NORTH, N, E, W, S, RandomMaze, derive_seed
+
+"""
+An endless maze plane split into square chunks. Every chunk is a RandomMaze carved
+from a seed derived from the world seed and the chunk coordinates, so any chunk can
+be rebuilt at any time and always comes out the same.
+
+A chunk owns its north and east edges, like a cell owns its north and east walls.
+Each of those edges is opened at one position derived from the world seed and the
+chunk coordinates, so a chunk and its neighbors always agree on the passages between
+them without either having to be generated first.
+
+Only the most recently used chunks are kept, older ones are dropped and regenerated
+when they are needed again, so the memory used stays the same however far the
+players travel.
+"""
+
+
+class MazeWorld:
+
+    # Constructor
+    def __init__(self, chunk_size=64, seed=0, cache_size=256, method='fast'):
+        """
+        :param chunk_size: The width and height of a chunk in cells.
+        :param seed: The world seed, the same seed always gives the same world.
+        :param cache_size: The number of chunks kept in memory.
+        :param method: The RandomMaze generation method used for the chunks.
+        """
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.cache_size = cache_size
+        self.method = method
+        self.chunks = OrderedDict()
+
+    # ------------------------------------------------
+    # Returns the wall flags of a chunk, generating it if
+    # it is not in the cache. Using a chunk moves it to the
+    # back of the cache and the least recently used chunk
+    # is dropped once the cache is full.
+    # ------------------------------------------------
+    def get_chunk(self, chunk_x, chunk_y):
+        """
+        :param chunk_x: The x coordinate of the chunk.
+        :param chunk_y: The y coordinate of the chunk.
+        :return: The chunk's wall flags as bytes, chunk_size rows of chunk_size cells.
+        """
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = self._generate_chunk(chunk_x, chunk_y)
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.cache_size:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    # ------------------------------------------------
+    # Carves a chunk as a perfect maze and opens its north
+    # and east edges.
+    # ------------------------------------------------
+    def _generate_chunk(self, chunk_x, chunk_y):
+        """
+        :param chunk_x: The x coordinate of the chunk.
+        :param chunk_y: The y coordinate of the chunk.
+        :return: The chunk's wall flags as bytes.
+        """
+        size = self.chunk_size
+        stride = size + 1
+
+        # The chunk is carved inside the bordering last row and column of a RandomMaze.
+        maze = RandomMaze(stride, stride, seed=derive_seed(self.seed, 'chunk', chunk_x, chunk_y))
+        maze._carve(self.method)
+        walls = bytearray(b''.join(maze.walls[row * stride:row * stride + size] for row in range(size)))
+
+        # The passages to the chunks above and to the right.
+        walls[self._edge(chunk_x, chunk_y, 'north')] &= ~NORTH
+        walls[self._edge(chunk_x, chunk_y, 'east') * size + size - 1] &= ~EAST
+        return bytes(walls)
+
+    # ------------------------------------------------
+    # Picks where an edge of a chunk is opened, a column
+    # for the north edge and a row for the east edge.
+    # ------------------------------------------------
+    def _edge(self, chunk_x, chunk_y, side):
+        """
+        :param chunk_x: The x coordinate of the chunk.
+        :param chunk_y: The y coordinate of the chunk.
+        :param side: 'north' or 'east'.
+        :return: The position of the passage along the edge.
+        """
+        return Random(derive_seed(self.seed, side, chunk_x, chunk_y)).randrange(self.chunk_size)
+
+    # ------------------------------------------------
+    # Returns the wall flags of a single cell of the world.
+    # ------------------------------------------------
+    def cell(self, x, y):
+        """
+        :param x: The x coordinate of the cell, any integer.
+        :param y: The y coordinate of the cell, any integer.
+        :return: The cell's NORTH and EAST flags.
+        """
+        size = self.chunk_size
+        chunk = self.get_chunk(x // size, y // size)
+        return chunk[(y % size) * size + x % size]
+
+    # ------------------------------------------------
+    # Checks if the wall in a direction from a cell is
+    # open, the south and west walls belong to the cells
+    # below and to the left like in RandomMaze.
+    # ------------------------------------------------
+    def is_open(self, x, y, direction):
+        """
+        :param x: The x coordinate of the cell.
+        :param y: The y coordinate of the cell.
+        :param direction: A direction code, N, E, W or S.
+        :return: Boolean, true if there is no wall, false if there is.
+        """
+        if direction == N:
+            return not self.cell(x, y) & NORTH
+        if direction == E:
+            return not self.cell(x, y) & EAST
+        if direction == W:
+            return not self.cell(x - 1, y) & EAST
+        if direction == S:
+            return not self.cell(x, y + 1) & NORTH
+        raise ValueError("Unknown direction: %s" % direction)
+
+    # ------------------------------------------------
+    # Renders a window of the world with the ¯| strings
+    # RandomMaze uses.
+    # ------------------------------------------------
+    def get_maze(self, x, y, width, height):
+        """
+        :param x: The x coordinate of the top left cell.
+        :param y: The y coordinate of the top left cell.
+        :param width: The number of cells in a row.
+        :param height: The number of rows.
+        :return: A 2D array of ¯| strings.
+        """
+        return [[CELL_STRINGS[self.cell(column, row)] for column in range(x, x + width)]
+                for row in range(y, y + height)]
@@ -9,15 +9,18 @@ Contact: kylea.castillo1999@gmail.com
 Point class to assist with returning the path information.
 Stores the point itself as well as a reference to a parent node.
 This helps build a tree of points to be used in the maze
-to record the path that is taken.
+to record the path that is taken. On a hex maze x and y are
+axial coordinates, on a 3D maze z is the floor and
+2D points have no z.
 """
 
 
 class Point:
     # Constructor
-    def __init__(self, x, y, parent=None):
+    def __init__(self, x, y, parent=None, z=None):
         self.x = x
         self.y = y
+        self.z = z
         self.__parent = parent
 
     def get_x(self):
@@ -26,6 +29,9 @@ class Point:
     def get_y(self):
         return self.y
 
+    def get_z(self):
+        return self.z
+
     # For tree creation
     def get_parent(self):
         return self.__parent
@@ -40,4 +46,6 @@ class Point:
             return (point.get_y() - self.y) / (point.get_x() - self.x)
 
     def __str__(self):
-        return "Point(%s,%s)" % (self.x, self.y)
+        if self.z is None:
+            return "Point(%s,%s)" % (self.x, self.y)
+        return "Point(%s,%s,%s)" % (self.x, self.y, self.z)
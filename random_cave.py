@@ -0,0 +1,181 @@
+from random_maze import EAST, NORTH, RandomMaze, np, require_numpy
+
+"""
+Open cave levels grown with a cellular automaton, as an alternative to the corridor
+mazes of RandomMaze.generate_maze. The grid starts as random rock and floor and is
+smoothed a few times, each cell turning to rock when enough of its eight neighbors
+are rock. Every step counts the neighbors of the whole grid at once with shifted
+array slices, so a 4k x 4k cave takes a handful of NumPy passes.
+
+The separate caves left over are found with a vectorized union-find over the pairs
+of neighboring floor cells and then joined to the largest cave with short tunnels.
+The result is a CaveMaze whose walls stand between floor and rock, with the rock
+marked as outside the maze, so the solvers and braid() work on it unchanged.
+"""
+
+
+class CaveMaze(RandomMaze):
+
+    # ------------------------------------------------
+    # The start and goal cells. Unlike RandomMaze both
+    # are simply at x, y, so any floor cell can be the
+    # start or the goal of a cave.
+    # ------------------------------------------------
+    def _start_cell(self):
+        """
+        :return: The index of the start cell.
+        """
+        return self._search_start()
+
+    def _goal_cell(self):
+        """
+        :return: The index of the goal cell.
+        """
+        return self.goal_y * self.width + self.goal_x
+
+
+# ------------------------------------------------
+# Counts the rock cells among the eight neighbors of
+# every cell, cells beyond the edge count as rock.
+# ------------------------------------------------
+def _rock_neighbors(rock):
+    """
+    :param rock: A (height, width) bool array, true for rock.
+    :return: A (height, width) uint8 array of neighbor counts.
+    """
+    height, width = rock.shape
+    padded = np.ones((height + 2, width + 2), dtype=np.uint8)
+    padded[1:-1, 1:-1] = rock
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                counts += padded[dy:dy + height, dx:dx + width]
+    return counts
+
+
+# ------------------------------------------------
+# Labels the connected caves of the floor. Each row is
+# first split into runs of floor, and one link is made
+# for every stretch where two runs of neighboring rows
+# touch. The runs are then hooked onto the smaller of
+# the two roots of every link and compressed by pointer
+# jumping, repeated until no link joins two roots, which
+# takes a few dozen array passes over the runs rather
+# than a loop per cell.
+# ------------------------------------------------
+def _label_caves(floor):
+    """
+    :param floor: A (height, width) bool array, true for floor.
+    :return: A flat int array with the first cell of every floor cell's cave, -1 for rock.
+    """
+    width = floor.shape[1]
+    run_starts = floor.copy()
+    run_starts[:, 1:] &= ~floor[:, :-1]
+    runs = np.cumsum(run_starts.reshape(-1)) - 1
+
+    touching = floor[:-1, :] & floor[1:, :]
+    links = touching.copy()
+    links[:, 1:] &= ~touching[:, :-1]
+    links = links.reshape(-1)
+    first = runs[:-width][links]
+    second = runs[width:][links]
+
+    parent = np.arange(runs[-1] + 1)
+    while True:
+        first_root = parent[first]
+        second_root = parent[second]
+        differ = first_root != second_root
+        if not differ.any():
+            break
+        low = np.minimum(first_root, second_root)[differ]
+        high = np.maximum(first_root, second_root)[differ]
+        np.minimum.at(parent, high, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    # The root run of a cave is its first run, its first cell names the cave.
+    start_cells = np.flatnonzero(run_starts)
+    return np.where(floor.reshape(-1), start_cells[parent[runs]], -1)
+
+
+# ---------------------------------------------------------------------------------
+# Generates a cave level. The smoothed grid is labelled, caves smaller than min_size
+# are filled with rock and every other cave is joined by an L shaped tunnel to the
+# nearest cave already connected, starting from the largest one.
+# ---------------------------------------------------------------------------------
+def generate_cave(width, height, seed=None, fill=0.45, steps=5, birth=5, survive=4, min_size=0):
+    """
+    :param width: The width of the cave, including the bordering last column like RandomMaze.
+    :param height: The height of the cave, including the bordering last row.
+    :param seed: Seed for the random fill, None draws fresh entropy.
+    :param fill: The share of cells that start as rock.
+    :param steps: The number of smoothing steps.
+    :param birth: Floor turns to rock with at least this many rock neighbors.
+    :param survive: Rock stays rock with at least this many rock neighbors.
+    :param min_size: Caves with fewer cells are filled in instead of being joined.
+    :return: A CaveMaze of the cave, the rock is outside the maze.
+    """
+    require_numpy("generate_cave")
+    maze = CaveMaze(width, height, seed=seed)
+    rng = np.random.default_rng(maze.rng.getrandbits(64))
+    c_width = width - 1
+    c_height = height - 1
+
+    rock = rng.random((c_height, c_width)) < fill
+    for _ in range(steps):
+        counts = _rock_neighbors(rock)
+        rock = np.where(rock, counts >= survive, counts >= birth)
+
+    # -----------------------------------------------------------------------
+    # Every cave is named by its first cell. Caves are joined from the largest
+    # down, each to the closest first cell of the caves joined so far.
+    # -----------------------------------------------------------------------
+    floor = ~rock
+    if not floor.any():
+        raise ValueError("The cave has no floor, try a lower fill")
+    labels = _label_caves(floor)
+    caves, sizes = np.unique(labels[labels >= 0], return_counts=True)
+    if min_size:
+        keep = sizes >= min_size
+        if not keep.any():
+            raise ValueError("No cave has %d cells, try a lower min_size" % min_size)
+        floor &= np.isin(labels, caves[keep]).reshape(floor.shape)
+        caves, sizes = caves[keep], sizes[keep]
+
+    ys, xs = np.divmod(caves[np.argsort(-sizes, kind='stable')], c_width)
+    for index in range(1, len(caves)):
+        distance = np.abs(ys[:index] - ys[index]) + np.abs(xs[:index] - xs[index])
+        nearest = int(np.argmin(distance))
+        x1, y1, x2, y2 = int(xs[index]), int(ys[index]), int(xs[nearest]), int(ys[nearest])
+        floor[y1, min(x1, x2):max(x1, x2) + 1] = True
+        floor[min(y1, y2):max(y1, y2) + 1, x2] = True
+
+    # -----------------------------------------------------------------------
+    # Walls stand wherever floor meets rock or the border, the rock and the
+    # border are outside the maze so the solvers never step on them.
+    # -----------------------------------------------------------------------
+    walls = np.full((height, width), NORTH | EAST, dtype=np.uint8)
+    open_north = floor.copy()
+    open_north[0, :] = False
+    open_north[1:, :] &= floor[:-1, :]
+    open_east = floor.copy()
+    open_east[:, -1] = False
+    open_east[:, :-1] &= floor[:, 1:]
+    walls[:c_height, :c_width] = np.where(open_north, 0, NORTH) | np.where(open_east, 0, EAST)
+    maze.walls[:] = walls.tobytes()
+
+    outside = np.ones((height, width), dtype=np.uint8)
+    outside[:c_height, :c_width] = ~floor
+    maze.outside = outside.tobytes()
+    maze.masked = True
+
+    # The start is the first floor cell and the goal the last one.
+    open_cells = np.flatnonzero(outside.reshape(-1) == 0)
+    maze.start_y, maze.start_x = divmod(int(open_cells[0]), width)
+    maze.goal_y, maze.goal_x = divmod(int(open_cells[-1]), width)
+    maze._mark_endpoints()
+    return maze
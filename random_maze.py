@@ -5,9 +5,22 @@ Date: 02/05/2021
 Contact: kylea.castillo1999@gmail.com
 """
 
-from random import shuffle
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+from hashlib import blake2b
+from os import replace
+from pickle import HIGHEST_PROTOCOL, dump, load
+from random import Random
 from point import Point
 
+# NumPy is optional, it is only needed for array views of the maze.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 """
 Generates a 2D array that consists entirely of walls only.
 It passes through a specified maze value size and generates
@@ -16,251 +29,1750 @@ a size x size maze based on that value.
 In this case the starting point will always be treated as the first value
 in the array. Borders will the the outermost values.
 
-This maze is also encoded as each cell having ¯| to designate where the walls of the maze are.
+The maze is stored as a flat bytearray with one byte of flags per cell, row after row.
+A cell stores its own north and east walls, its south and west walls are the north wall
+of the cell below and the east wall of the cell to the left. get_maze() renders the
+cells with ¯| to designate where the walls of the maze are.
 """
 
+# Flags stored in each byte of the wall grid.
+NORTH = 1
+EAST = 2
+START = 4
+GOAL = 8
+
+# Direction codes, in the order of the original ['N', 'E', 'W', 'S'] list.
+N, E, W, S = 0, 1, 2, 3
+
+# The methods generate_maze accepts.
+METHODS = ('iterative', 'recursive', 'kruskal', 'eller', 'wilson', 'binary_tree', 'sidewinder', 'fast',
+           'growing_tree', 'prim', 'division', 'hunt_and_kill', 'bitboard_binary_tree', 'bitboard_sidewinder')
+
+# The methods that carve a rectangle and can not follow a mask.
+RECTANGLE_METHODS = ('binary_tree', 'sidewinder', 'eller', 'division', 'bitboard_binary_tree', 'bitboard_sidewinder')
+
+# The methods that carve a perfect maze, one path between any two cells. The back trackers
+# keep the one extra loop the original generator made at the start.
+PERFECT_METHODS = ('kruskal', 'eller', 'wilson', 'binary_tree', 'sidewinder', 'fast', 'growing_tree', 'prim',
+                   'division', 'hunt_and_kill', 'bitboard_binary_tree', 'bitboard_sidewinder')
+
+# The bitboard methods and the bitboard_rows style each of them carves.
+BITBOARD_STYLES = {'bitboard_binary_tree': 'binary_tree', 'bitboard_sidewinder': 'sidewinder'}
+
+# The methods that can report every passage they carve.
+EVENT_METHODS = ('iterative', 'recursive', 'fast', 'growing_tree', 'prim', 'hunt_and_kill', 'kruskal', 'wilson')
+
+# The methods that can carve a maze whose edges wrap around, see RandomMaze._neighbor_tables.
+WRAP_METHODS = ('kruskal', 'wilson')
+
+# The methods that can save checkpoints and resume from them.
+CHECKPOINT_METHODS = ('iterative', 'fast', 'growing_tree', 'prim')
+
+# Cell selection policies of the growing tree method, as weights for (newest, random, oldest).
+POLICIES = {'newest': (1, 0, 0), 'random': (0, 1, 0), 'oldest': (0, 0, 1), 'mix': (1, 1, 0)}
+
+# All 24 orders of the four directions, flattened to four bytes per order, and a table
+# mapping random bytes to an order number. Bytes from 240 up are dropped so every order
+# is equally likely.
+PERMUTATIONS = bytes(direction for order in permutations((N, E, W, S)) for direction in order)
+PERMUTATION_TABLE = bytes(value % 24 for value in range(256))
+PERMUTATION_REJECT = bytes(range(240, 256))
+
+# bytes.translate tables that set a wall flag on every byte of a slice.
+ADD_NORTH = bytes(flags | NORTH for flags in range(256))
+ADD_EAST = bytes(flags | EAST for flags in range(256))
+
+# A bytes.translate table turning the characters '0' and '1' into the bytes 0 and 1.
+BIT_CHARACTERS = bytes(value - 48 if value in (48, 49) else value for value in range(256))
+
+# The direction codes set in every six bit mask of directions, enough for hex grids.
+MASK_DIRECTIONS = tuple(tuple(direction for direction in range(6) if mask >> direction & 1)
+                        for mask in range(64))
+
+# The rendered string for every combination of flags, the start and goal replace the north wall.
+CELL_STRINGS = tuple(('G' if flags & GOAL else 'S' if flags & START else '¯' if flags & NORTH else ' ')
+                     + ('|' if flags & EAST else ' ') for flags in range(16))
+
+
+# ---------------------------------------------------------------------------------
+# Splits a seed into independent seeds for the parts of a job, such as tiles or mazes
+# of a batch. The derived seed depends only on the seed and the keys, so every part
+# comes out the same however the work is spread over processes.
+# ---------------------------------------------------------------------------------
+def derive_seed(seed, *keys):
+    """
+    :param seed: The parent seed, an int or a string.
+    :param keys: Ints or strings naming the part, e.g. 'tile', 3, 7.
+    :return: A 64 bit int seed.
+    """
+    digest = blake2b(repr((seed,) + keys).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+# ------------------------------------------------
+# Reads a PBM bitmap (P1 text or P4 binary) for use as
+# a maze mask, black pixels are the cells of the maze.
+# ------------------------------------------------
+def load_mask(path):
+    """
+    :param path: The path to the .pbm file.
+    :return: A list of bytes rows with 1 for cells in the maze and 0 for cells outside.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    # The header is the magic number, the width and the height, with # comments allowed.
+    fields = []
+    position = 0
+    while len(fields) < 3:
+        while data[position:position + 1].isspace():
+            position += 1
+        if data[position:position + 1] == b'#':
+            position = data.index(b'\n', position) + 1
+            continue
+        end = position
+        while end < len(data) and not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[position:end])
+        position = end
+    magic, width, height = fields[0], int(fields[1]), int(fields[2])
+
+    if magic == b'P4':
+        # One whitespace byte ends the header, then rows of bits padded to whole bytes.
+        position += 1
+        row_bytes = (width + 7) // 8
+        rows = []
+        for row in range(height):
+            start = position + row * row_bytes
+            bits = int.from_bytes(data[start:start + row_bytes], 'big')
+            text = format(bits, '0%db' % (8 * row_bytes))[:width]
+            rows.append(text.encode().translate(BIT_CHARACTERS))
+        return rows
+    if magic == b'P1':
+        pixels = bytes(value for value in data[position:] if value in b'01').translate(BIT_CHARACTERS)
+        return [pixels[row * width:(row + 1) * width] for row in range(height)]
+    raise ValueError("Not a PBM bitmap: %s" % path)
+
+
+def require_numpy(feature):
+    """
+    :param feature: The name of the feature that needs NumPy, used in the error.
+    :return: None, raises an ImportError when NumPy is not installed.
+    """
+    if np is None:
+        raise ImportError("NumPy is required for %s" % feature)
+
+
+# ------------------------------------------------
+# Turns a growing tree policy into its weights, a
+# name from POLICIES or three weights of its own.
+# ------------------------------------------------
+def _policy_weights(policy):
+    """
+    :param policy: A name from POLICIES or a tuple of (newest, random, oldest) weights.
+    :return: The (newest, random, oldest) weights, raises a ValueError for anything else.
+    """
+    if isinstance(policy, str):
+        if policy not in POLICIES:
+            raise ValueError("Unknown growing tree policy: %s" % policy)
+        return POLICIES[policy]
+    if (not isinstance(policy, (tuple, list)) or len(policy) != 3
+            or not all(isinstance(weight, (int, float)) for weight in policy)
+            or min(policy) < 0 or sum(policy) <= 0):
+        raise ValueError("Unknown growing tree policy: %s" % (policy,))
+    return tuple(policy)
+
+
+# ---------------------------------------------------------------------------------
+# Binary tree mazes for a whole batch at once. Every cell carves either north or east
+# chosen by one array of random bits, the top row can only carve east and the last
+# column only north. The result is an (n, height, width) array of wall flags with the
+# same bordering last row and column as RandomMaze.
+# ---------------------------------------------------------------------------------
+def binary_tree_mazes(n, width, height, seed=None):
+    """
+    :param n: The number of mazes to generate.
+    :param width: The width of each maze, including the bordering last column.
+    :param height: The height of each maze, including the bordering last row.
+    :param seed: Seed for the NumPy generator, None draws fresh entropy.
+    :return: A uint8 array of shape (n, height, width).
+    """
+    require_numpy("binary_tree_mazes")
+    rng = np.random.default_rng(seed)
+    c_width = width - 1
+    c_height = height - 1
+
+    carve_north = rng.integers(0, 2, size=(n, c_height, c_width), dtype=np.uint8).astype(bool)
+    carve_north[:, 0, :] = False
+    carve_north[:, 1:, -1] = True
+    carve_east = ~carve_north
+    carve_east[:, :, -1] = False
+
+    mazes = np.full((n, height, width), NORTH | EAST, dtype=np.uint8)
+    mazes[:, :c_height, :c_width] = np.where(carve_north, 0, NORTH) | np.where(carve_east, 0, EAST)
+    return mazes
+
+
+# ---------------------------------------------------------------------------------
+# Sidewinder mazes for a whole batch at once. Random bits decide which cells carve
+# east and so split every row into runs, the top row is a single run. Each run below
+# the top row then carves north from one random cell, picked for all runs of all
+# mazes with a single draw.
+# ---------------------------------------------------------------------------------
+def sidewinder_mazes(n, width, height, seed=None):
+    """
+    :param n: The number of mazes to generate.
+    :param width: The width of each maze, including the bordering last column.
+    :param height: The height of each maze, including the bordering last row.
+    :param seed: Seed for the NumPy generator, None draws fresh entropy.
+    :return: A uint8 array of shape (n, height, width).
+    """
+    require_numpy("sidewinder_mazes")
+    rng = np.random.default_rng(seed)
+    c_width = width - 1
+    c_height = height - 1
+
+    carve_east = rng.integers(0, 2, size=(n, c_height, c_width), dtype=np.uint8).astype(bool)
+    carve_east[:, 0, :] = True
+    carve_east[:, :, -1] = False
+
+    # Runs below the top row, flattened so every run is one contiguous stretch of cells.
+    carve_north = np.zeros_like(carve_east)
+    lower_east = carve_east[:, 1:, :].reshape(-1)
+    if lower_east.size:
+        run_start = np.empty(lower_east.shape, dtype=bool)
+        run_start[0] = True
+        run_start[1:] = ~lower_east[:-1]
+        starts = np.flatnonzero(run_start)
+        lengths = np.diff(np.append(starts, lower_east.size))
+        chosen = starts + (rng.random(starts.size) * lengths).astype(np.int64)
+
+        lower_north = np.zeros(lower_east.shape, dtype=bool)
+        lower_north[chosen] = True
+        carve_north[:, 1:, :] = lower_north.reshape(n, c_height - 1, c_width)
+
+    mazes = np.full((n, height, width), NORTH | EAST, dtype=np.uint8)
+    mazes[:, :c_height, :c_width] = np.where(carve_north, 0, NORTH) | np.where(carve_east, 0, EAST)
+    return mazes
+
+
+# ---------------------------------------------------------------------------------
+# Eller's algorithm, builds a perfect maze one row at a time and yields each row as
+# soon as it is finished. Only the set labels of the current row are kept, so the
+# memory used depends on the width alone and the height can be as large as needed.
+# Rows use the same wall flags as RandomMaze and can be written straight to a file.
+# ---------------------------------------------------------------------------------
+def eller_rows(width, height, seed=None):
+    """
+    :param width: The number of cells in a row.
+    :param height: The number of rows to generate.
+    :param seed: Seed for the random choices, None draws fresh entropy.
+    :return: A generator of bytes objects, one finished row of wall flags at a time.
+    """
+    rng = Random(seed)
+    # ------------------------------------------------------------------
+    # Every cell holds the label of its set. There are never more sets
+    # than cells in a row, so labels are recycled from 0 to width - 1 and
+    # joined with a union-find that is reset for every row.
+    # ------------------------------------------------------------------
+    labels = array('i', range(width))
+    identity = array('i', range(width))
+    parent = array('i', identity)
+    members = array('i', [0] * width)
+    used = bytearray(width)
+    north_open = bytearray(width)
+
+    def find(label):
+        """
+        :param label: The label to look up.
+        :return: The root label of the set.
+        """
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    for y in range(height):
+        last_row = y == height - 1
+        row = bytearray([NORTH | EAST]) * width
+
+        # The north walls were decided while finishing the previous row.
+        if y > 0:
+            for x in range(width):
+                if north_open[x]:
+                    row[x] = EAST
+
+        # ------------------------------------------------------------------
+        # Join neighbors in different sets at random. The last row joins
+        # every pair of different sets so the maze ends up connected.
+        # ------------------------------------------------------------------
+        coins = rng.randbytes(width)
+        for x in range(width - 1):
+            left = find(labels[x])
+            right = find(labels[x + 1])
+            if left != right and (last_row or coins[x] & 1):
+                parent[right] = left
+                row[x] &= ~EAST
+
+        yield bytes(row)
+        if last_row:
+            return
+
+        # ------------------------------------------------------------------
+        # Every set carries on into the next row through at least one cell.
+        # Cells drop down at random and the last cell of a set that has not
+        # dropped down yet always does.
+        # ------------------------------------------------------------------
+        for x in range(width):
+            labels[x] = find(labels[x])
+            members[labels[x]] += 1
+
+        coins = rng.randbytes(width)
+        for x in range(width):
+            label = labels[x]
+            members[label] -= 1
+            if coins[x] & 1 or (members[label] == 0 and not used[label]):
+                used[label] = 1
+                north_open[x] = 1
+            else:
+                north_open[x] = 0
+
+        # Cells that did not drop down start the next row in a fresh set.
+        free = (label for label in range(width) if not used[label])
+        for x in range(width):
+            if not north_open[x]:
+                labels[x] = next(free)
+        used[:] = bytes(width)
+        parent[:] = identity
+
+
+# ---------------------------------------------------------------------------------
+# Binary tree and sidewinder mazes built with big integers instead of NumPy. Each row's
+# open walls are two ints with one bit per cell, the first cell in the highest bit, so
+# a whole row is carved with a handful of shifts and masks however wide it is. A
+# sidewinder run carves north from its last cell that wins a coin toss, or from its
+# first cell when none does, which is found for every run at once by a subtraction
+# whose borrow stops inside each run.
+# ---------------------------------------------------------------------------------
+def bitboard_rows(width, height, seed=None, style='sidewinder'):
+    """
+    :param width: The number of cells in a row.
+    :param height: The number of rows to generate.
+    :param seed: Seed for the random choices, None draws fresh entropy.
+    :param style: 'sidewinder' or 'binary_tree'.
+    :return: A generator of bytes objects, one finished row of wall flags at a time.
+    """
+    if style not in ('sidewinder', 'binary_tree'):
+        raise ValueError("Unknown bitboard style: %s" % style)
+    rng = Random(seed)
+    full = (1 << width) - 1
+    first = 1 << (width - 1)
+    last = 1
+    bits = '0%db' % width
+
+    for y in range(height):
+        if y == 0:
+            # The top row is one passage to the east.
+            north_open = 0
+            east_open = full ^ last
+        elif style == 'binary_tree':
+            north_open = rng.getrandbits(width) | last
+            east_open = full ^ north_open
+        else:
+            # -------------------------------------------------------------
+            # Runs end at the cells that do not carve east and start after
+            # them. Subtracting the run ends borrows through the cells that
+            # lost the toss up to the first candidate in each run, so the
+            # bits that flip and are set hold exactly one cell per run.
+            # -------------------------------------------------------------
+            east_open = rng.getrandbits(width) & ~last
+            run_ends = full ^ east_open
+            run_starts = run_ends >> 1 | first
+            candidates = rng.getrandbits(width) | run_starts
+            north_open = candidates & (candidates ^ (candidates - run_ends))
+
+        # Spread the bits to one byte per cell and combine the two flags.
+        north = int.from_bytes(format(full ^ north_open, bits).encode().translate(BIT_CHARACTERS), 'big')
+        east = int.from_bytes(format(full ^ east_open, bits).encode().translate(BIT_CHARACTERS), 'big')
+        yield (north * NORTH | east * EAST).to_bytes(width, 'big')
+
+
+# ------------------------------------------------
+# Carves one tile for RandomMaze.generate_tiled, it
+# runs in a worker process so it lives at module level.
+# ------------------------------------------------
+def _carve_tile(job):
+    """
+    :param job: A tuple of (tile width, tile height, method, seed).
+    :return: The wall flags of the tile as bytes, row after row.
+    """
+    tile_width, tile_height, method, tile_seed = job
+    tile = RandomMaze(tile_width + 1, tile_height + 1, seed=tile_seed)
+    tile._carve(method)
+    stride = tile_width + 1
+    return b''.join(tile.walls[row * stride:row * stride + tile_width] for row in range(tile_height))
+
+
+# ------------------------------------------------
+# Generates one block of mazes for generate_many, it
+# runs in a worker process so it lives at module level.
+# ------------------------------------------------
+def _generate_block(job):
+    """
+    :param job: A tuple of (block number, maze count, width, height, method, seed).
+    :return: The wall flags of the mazes as bytes, maze after maze.
+    """
+    block, count, width, height, method, base_seed = job
+    block_seed = derive_seed(base_seed, 'block', block)
+    if method == 'binary_tree':
+        return binary_tree_mazes(count, width, height, block_seed).tobytes()
+    if method == 'sidewinder':
+        return sidewinder_mazes(count, width, height, block_seed).tobytes()
+
+    # One maze is reused for the whole block, it is reset and reseeded for every maze.
+    maze = RandomMaze(width, height)
+    blank = bytes(maze.walls)
+    mazes = bytearray()
+    for index in range(count):
+        maze.walls[:] = blank
+        maze.rng.seed(derive_seed(block_seed, index))
+        maze._carve(method)
+        mazes += maze.walls
+    return bytes(mazes)
+
+
+# ---------------------------------------------------------------------------------
+# Generates many mazes of the same size into one contiguous (n, height, width) array.
+# The mazes are made in fixed blocks, each seeded from the batch seed and its block
+# number, so the array is the same however many processes share the work. Binary
+# tree and sidewinder blocks are carved with one vectorized call each, other methods
+# reuse a single RandomMaze per block. As the seeds follow the blocks, the same batch
+# needs the same seed and block_size.
+# ---------------------------------------------------------------------------------
+def generate_many(n, width, height, seed=None, method='sidewinder', workers=1, block_size=1024):
+    """
+    :param n: The number of mazes to generate.
+    :param width: The width of each maze, including the bordering last column.
+    :param height: The height of each maze, including the bordering last row.
+    :param seed: The batch seed, None draws fresh entropy.
+    :param method: Any generation method accepted by RandomMaze.generate_maze.
+    :param workers: The number of processes, 1 runs in this process and None uses every core.
+    :param block_size: The number of mazes generated together as one block, part of what
+                       the mazes depend on along with the seed, unlike workers.
+    :return: A uint8 array of shape (n, height, width) holding the wall flags of every maze,
+             without start and goal markers.
+    """
+    require_numpy("generate_many")
+    if method not in METHODS:
+        raise ValueError("Unknown generation method: %s" % method)
+    if seed is None:
+        seed = Random().getrandbits(64)
+
+    mazes = np.empty((n, height, width), dtype=np.uint8)
+    flat = mazes.reshape(n, height * width)
+    jobs = [(block, min(block_size, n - first), width, height, method, seed)
+            for block, first in enumerate(range(0, n, block_size))]
+
+    def copy_blocks(blocks):
+        """
+        :param blocks: The generated blocks in the same order as the jobs.
+        :return: None
+        """
+        for (block, count, _, _, _, _), data in zip(jobs, blocks):
+            first = block * block_size
+            flat[first:first + count] = np.frombuffer(data, dtype=np.uint8).reshape(count, -1)
+
+    if workers == 1:
+        copy_blocks(map(_generate_block, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            copy_blocks(executor.map(_generate_block, jobs))
+    return mazes
+
 
 class RandomMaze:
 
-    # Constructor
-    def __init__(self, width, height, start_x=0, start_y=0, goal_x=0, goal_y=0):
+    # ------------------------------------------------
+    # The grid model, a subclass with another shape of
+    # cell changes these together with _links. The codes
+    # are numbered so the opposite of a direction is the
+    # last code minus the direction, and the first half
+    # are the walls a cell stores itself.
+    # ------------------------------------------------
+    DIRECTIONS = (N, E, W, S)
+    ALL_WALLS = NORTH | EAST
+    BREADTH_FIRST_ORDER = (N, S, E, W)
+    DEPTH_FIRST_ORDER = (N, S, W, E)
+    _cell_strings = CELL_STRINGS
+
+    # The generation methods that work on this grid and the name of its cells. Tiling,
+    # braiding and wrapping are built around square cells and need GRID == 'square'.
+    SUPPORTED_METHODS = METHODS
+    GRID = 'square'
+
+    # The (file, passages between saves, method, policy) of a generation that saves checkpoints.
+    _checkpoint = None
+
+    # The function called with (x, y, direction) for every passage carved, see generate_maze.
+    _on_carve = None
+
+    # ------------------------------------------------
+    # Constructor, every maze has its own random number
+    # generator. The same seed and size always give the
+    # same maze, None seeds from the operating system.
+    # A mask gives the maze any shape, see _apply_mask.
+    # Wrap joins the east edge to the west edge and the
+    # north edge to the south edge, like a torus. Such a
+    # maze is generated with method='kruskal' or 'wilson',
+    # generate_maze picks 'kruskal' when none is given.
+    # ------------------------------------------------
+    def __init__(self, width, height, start_x=0, start_y=0, goal_x=0, goal_y=0, seed=None, mask=None,
+                 wrap=False):
         self.width = width
         self.height = height
         self.start_x = start_x
         self.start_y = start_y
         self.goal_x = goal_x
         self.goal_y = goal_y
-        self.maze = [['¯|'] * self.width for _ in range(self.height)]
+        self.seed = seed
+        self.rng = Random(seed)
+        self.walls = bytearray([self.ALL_WALLS]) * (self.width * self.height)
+
+        # Cells outside the maze, the bordering last row and column and any masked cells.
+        row = bytes(self.width - 1) + b'\x01'
+        self.outside = row * (self.height - 1) + b'\x01' * self.width
+        self.wrap = wrap
+        if wrap and self.GRID != 'square':
+            raise ValueError("Wrapping only works on square grids")
+        self.masked = mask is not None
+        if self.masked:
+            self._apply_mask(load_mask(mask) if isinstance(mask, str) else mask)
+
+    def get_maze(self, as_array=False):
+        """
+        :param as_array: Return a read-only NumPy view of the wall grid instead of strings.
+        :return: The maze rendered as a 2D array of ¯| strings, or a (height, width) uint8 array
+                 of wall flags that shares memory with the maze.
+        """
+        if as_array:
+            require_numpy("get_maze(as_array=True)")
+            view = np.frombuffer(self.walls, dtype=np.uint8).reshape(self.height, self.width)
+            view.flags.writeable = False
+            return view
 
-    def get_maze(self):
-        return self.maze
+        width = self.width
+        walls = self.walls
+        cell_strings = self._cell_strings
+        return [[cell_strings[flags] for flags in walls[row:row + width]]
+                for row in range(0, width * self.height, width)]
+
+    # ------------------------------------------------
+    # Builds the flat visited array used by the generators
+    # and solvers. The last row and column are marked as
+    # visited, so stepping off any side of the grid lands
+    # on a visited cell (a step north from the first row
+    # wraps to the last row, a step west from the first
+    # column wraps to the last column of the row above).
+    # ------------------------------------------------
+    def _new_visited(self):
+        """
+        :return: A bytearray with 1 for visited cells and 0 for open cells.
+        """
+        return bytearray(self.outside)
+
+    # ------------------------------------------------
+    # Marks the cells the mask leaves out as outside the
+    # maze, so the generators and solvers treat them as
+    # visited from the start and never step on them. The
+    # mask has one row per maze row and one value per
+    # cell, truthy for cells of the maze. The bordering
+    # last row and column always stay outside, and so do
+    # cells that can not be reached from the start.
+    # ------------------------------------------------
+    def _apply_mask(self, mask):
+        """
+        :param mask: A (height, width) sequence of rows, a NumPy array or rows from load_mask.
+        :return: None
+        """
+        width = self.width
+        rows = [bytes(0 if value else 1 for value in row) for row in mask]
+        if len(rows) != self.height or any(len(row) != width for row in rows):
+            raise ValueError("The mask must have %d rows of %d cells" % (self.height, width))
+        masked = bytes(a | b for a, b in zip(b''.join(rows), self.outside))
+
+        # Keep only the cells connected to the start, the outside border stops the fill.
+        start = self._search_start()
+        if masked[start]:
+            raise ValueError("The start (%d, %d) is not a cell of the mask" % (self.start_x, self.start_y))
+        neighbors = tuple(table[0] for table in self._neighbor_tables())
+        outside = bytearray(b'\x01') * len(masked)
+        outside[start] = 0
+        stack = array('i', [start])
+        while stack:
+            cell = stack.pop()
+            for next_cells in neighbors:
+                next_cell = next_cells[cell]
+                if not masked[next_cell] and outside[next_cell]:
+                    outside[next_cell] = 0
+                    stack.append(next_cell)
+        self.outside = bytes(outside)
+
+    # ------------------------------------------------
+    # For every direction code the offset to the next cell,
+    # the offset to the cell that stores the wall between
+    # them and which flag the wall is.
+    # ------------------------------------------------
+    def _links(self):
+        """
+        :return: A tuple of (cell offset, wall offset, wall flag) indexed by direction code.
+        """
+        width = self.width
+        return ((-width, 0, NORTH),
+                (1, 0, EAST),
+                (-1, -1, EAST),
+                (width, width, NORTH))
+
+    # ------------------------------------------------
+    # The steps that leave the maze across an edge and
+    # come back on the other side when it wraps. Off the
+    # grid a step lands on the bordering last row or
+    # column like always, which is how the engines notice
+    # a crossing and look it up here instead. The walls
+    # on the wrapped edges are the north walls of the
+    # first row and the east walls of the last column.
+    # ------------------------------------------------
+    def _crossings(self):
+        """
+        :return: A tuple indexed by direction code of dicts that map the cells on an edge to the
+                 (next cell, wall cell) across it, all empty when the maze does not wrap.
+        """
+        crossings = tuple({} for _ in self.DIRECTIONS)
+        if not self.wrap:
+            return crossings
+
+        # The cells of the maze, without the bordering last row and column.
+        width = self.width
+        c_width = width - 1
+        last_row = (self.height - 2) * width
+        for x in range(c_width):
+            crossings[N][x] = (last_row + x, x)
+            crossings[S][last_row + x] = (x, x)
+        for row in range(0, last_row + width, width):
+            last = row + c_width - 1
+            crossings[E][last] = (row, last)
+            crossings[W][row] = (last, last)
+        return crossings
+
+    # ------------------------------------------------
+    # The links as tables indexed by cell, for the code
+    # that follows wrapped edges on every step. Without
+    # wrapping a table is a range, which adds the offset
+    # to any cell without storing anything. With wrapping
+    # the tables are arrays with the crossings filled in.
+    # ------------------------------------------------
+    def _neighbor_tables(self):
+        """
+        :return: A tuple of (next cells, wall cells, wall flag) indexed by direction code.
+        """
+        size = len(self.walls)
+        tables = []
+        for (offset, wall_offset, flag), crossings in zip(self._links(), self._crossings()):
+            next_cells = range(offset, offset + size)
+            if self.wrap:
+                next_cells = array('i', next_cells)
+                for cell, (next_cell, _) in crossings.items():
+                    next_cells[cell] = next_cell
+            # A wall is stored either in the cell itself or in the next cell, across the edges too.
+            tables.append((next_cells, next_cells if wall_offset else range(size), flag))
+        return tuple(tables)
 
     # ------------------------------------------------
     # Generates a maze based on the parameters based within
     # the class.
     # ------------------------------------------------
-    def generate_maze(self):
+    def generate_maze(self, method=None, policy='newest', checkpoint=None, checkpoint_every=1000000,
+                      on_carve=None):
         """
-        :return: Returns a 2D array which represents the maze.
+        :param method: None picks 'iterative', or 'kruskal' for a maze that wraps around its edges.
+                       'iterative' carves with an explicit stack and works for any size,
+                       'recursive' uses the original recursive traverse (limited to roughly 30x30),
+                       'kruskal' joins cells across randomly ordered walls with a union-find,
+                       'eller' fills the maze row by row with eller_rows,
+                       'wilson' builds a uniform spanning tree with loop-erased random walks,
+                       'binary_tree' and 'sidewinder' carve the whole grid with NumPy array operations,
+                       'fast' is a back tracker using precomputed direction orders and block random draws,
+                       'growing_tree' grows the maze from a list of active cells picked by the policy,
+                       'prim' adds random frontier cells to the maze like randomized Prim's algorithm,
+                       'division' splits an open grid into chambers with walls that have one gap,
+                       'hunt_and_kill' walks randomly and hunts row by row for a new cell when stuck,
+                       'bitboard_binary_tree' and 'bitboard_sidewinder' carve whole rows with big integer
+                       bit operations through bitboard_rows, without NumPy.
+                       A maze that wraps around its edges needs method='kruskal' or 'wilson',
+                       the other methods raise a ValueError for it.
+        :param policy: How growing_tree picks the next cell, 'newest' (back tracker like), 'random' (Prim like),
+                       'oldest', 'mix' (half newest, half random) or a tuple of (newest, random, oldest) weights.
+        :param checkpoint: A file to save the generation state to, see resume(). Only the
+                           'iterative', 'fast', 'growing_tree' and 'prim' methods support it.
+        :param checkpoint_every: The number of carved passages between checkpoints.
+        :param on_carve: A function called as on_carve(x, y, direction) every time the wall from
+                         cell x, y in the direction code N, E, W or S is removed, e.g. to draw the
+                         maze while it is generated. Supported by the 'iterative', 'recursive', 'fast',
+                         'growing_tree', 'prim', 'hunt_and_kill', 'kruskal' and 'wilson' methods.
+        :return: Returns the wall grid, use get_maze() for the 2D array of strings.
         """
-        # --------------------------------------------------------------------------------
-        # Height and width of the 2D cell array
-        # We are subtracting 1 for the purposes of marking the bottom and left as visited
-        # in order to prevent the program from attempting to go beyond the bounds of the
-        # maze.
-        # --------------------------------------------------------------------------------
+        if method is None:
+            method = 'kruskal' if self.wrap else 'iterative'
+        if checkpoint is not None:
+            if method not in CHECKPOINT_METHODS:
+                raise ValueError("Checkpoints are not supported by the %s method" % method)
+            self._checkpoint = (checkpoint, checkpoint_every, method, policy)
+        if on_carve is not None:
+            if method not in EVENT_METHODS:
+                raise ValueError("Carve events are not supported by the %s method" % method)
+            self._on_carve = on_carve
+        try:
+            self._carve(method, policy)
+        finally:
+            self._checkpoint = None
+            self._on_carve = None
+        self._mark_endpoints()
+        return self.walls
 
-        c_height = self.height - 1
-        c_width = self.width - 1
+    # ------------------------------------------------
+    # Continues a generation from the checkpoint file it
+    # saved, the finished maze is exactly the one the run
+    # would have made without stopping. Checkpoints are
+    # pickles, only resume from files you wrote.
+    # ------------------------------------------------
+    @classmethod
+    def resume(cls, checkpoint, checkpoint_every=None):
+        """
+        :param checkpoint: The checkpoint file written by generate_maze.
+        :param checkpoint_every: Passages between further checkpoints, None keeps the saved value
+                                 and 0 stops saving.
+        :return: The finished RandomMaze.
+        """
+        with open(checkpoint, 'rb') as file:
+            saved = load(file)
+
+        maze = cls(saved['width'], saved['height'], saved['start_x'], saved['start_y'],
+                   saved['goal_x'], saved['goal_y'], seed=saved['seed'])
+        maze.rng.setstate(saved['rng'])
+        maze.walls[:] = saved['walls']
+        maze.outside = saved['outside']
+        maze.masked = saved['masked']
+
+        if checkpoint_every is None:
+            checkpoint_every = saved['checkpoint_every']
+        if checkpoint_every:
+            maze._checkpoint = (checkpoint, checkpoint_every, saved['method'], saved['policy'])
+        try:
+            maze._carve(saved['method'], saved['policy'], saved['state'])
+        finally:
+            maze._checkpoint = None
+        maze._mark_endpoints()
+        return maze
+
+    # ------------------------------------------------
+    # Writes the state of a running generation to the
+    # checkpoint file. The file is written next to the
+    # old one and then swapped in, so a crash while saving
+    # leaves the previous checkpoint intact.
+    # ------------------------------------------------
+    def _save_checkpoint(self, state):
+        """
+        :param state: The engine's own arrays and counters, including visited_cells.
+        :return: None
+        """
+        path, checkpoint_every, method, policy = self._checkpoint
+        saved = {'width': self.width, 'height': self.height,
+                 'start_x': self.start_x, 'start_y': self.start_y,
+                 'goal_x': self.goal_x, 'goal_y': self.goal_y,
+                 'seed': self.seed, 'rng': self.rng.getstate(), 'walls': bytes(self.walls),
+                 'outside': self.outside, 'masked': self.masked,
+                 'method': method, 'policy': policy, 'checkpoint_every': checkpoint_every,
+                 'state': state}
+        temporary = '%s.tmp' % path
+        with open(temporary, 'wb') as file:
+            dump(saved, file, HIGHEST_PROTOCOL)
+        replace(temporary, path)
+
+    # ------------------------------------------------
+    # Carves the passages of the maze with the chosen
+    # method, without marking the start and goal.
+    # ------------------------------------------------
+    def _carve(self, method, policy='newest', state=None):
+        """
+        :param method: One of the generation methods accepted by generate_maze.
+        :param policy: The growing_tree policy accepted by generate_maze.
+        :param state: The engine state from a checkpoint to continue from, None starts afresh.
+        :return: None
+        """
+        if method not in METHODS:
+            raise ValueError("Unknown generation method: %s" % method)
+        if method not in self.SUPPORTED_METHODS:
+            raise ValueError("The %s method does not work on %s grids" % (method, self.GRID))
+        if state is not None and method not in CHECKPOINT_METHODS:
+            raise ValueError("Checkpoints are not supported by the %s method" % method)
+        if self.masked and method in RECTANGLE_METHODS:
+            raise ValueError("The %s method can not follow a mask" % method)
+        if self.wrap and method not in WRAP_METHODS:
+            raise ValueError("The %s method can not wrap around the edges" % method)
 
         # ------------------------------------------------------------------------------
         #  An array to keep track which cells have been visited and which cells are
-        # open to carve a maze.
+        # open to carve a maze. The bottom and right are marked as visited in order to
+        # prevent the program from attempting to go beyond the bounds of the maze.
         # -------------------------------------------------------------------------------
+        visited_cells = self._new_visited() if state is None else state['visited_cells']
+        start = self._search_start()
+
+        if method == 'recursive':
+            self._traverse(start, visited_cells)
+        elif method == 'fast':
+            self._traverse_fast(start, visited_cells, state)
+        elif method == 'growing_tree':
+            self._growing_tree(start, visited_cells, _policy_weights(policy), state)
+        elif method == 'prim':
+            self._prim(start, visited_cells, state)
+        elif method == 'division':
+            self._divide()
+        elif method == 'hunt_and_kill':
+            self._hunt_and_kill(start, visited_cells)
+        elif method == 'kruskal':
+            self._kruskal(visited_cells)
+        elif method == 'wilson':
+            self._wilson(start, visited_cells)
+        elif method in ('binary_tree', 'sidewinder'):
+            generate = binary_tree_mazes if method == 'binary_tree' else sidewinder_mazes
+            self.walls[:] = generate(1, self.width, self.height, self.rng.getrandbits(64)).tobytes()
+        elif method == 'eller':
+            # The rows fill everything but the bordering last row and column.
+            width = self.width
+            for row, cells in enumerate(eller_rows(width - 1, self.height - 1, self.rng.getrandbits(64))):
+                self.walls[row * width:(row + 1) * width - 1] = cells
+        elif method in BITBOARD_STYLES:
+            width = self.width
+            rows = bitboard_rows(width - 1, self.height - 1, self.rng.getrandbits(64), BITBOARD_STYLES[method])
+            for row, cells in enumerate(rows):
+                self.walls[row * width:(row + 1) * width - 1] = cells
+        else:
+            self._traverse_iterative(start, visited_cells, state)
+
+    # ---------------------------------------------------------------------------------
+    # Tiled generation for very large mazes. The grid is split into tiles that are carved
+    # as separate perfect mazes in a pool of processes. The tiles are then treated as the
+    # cells of a small maze of their own, and every passage of that maze opens exactly
+    # one wall on the seam between two tiles, so the result is still one perfect maze.
+    # ---------------------------------------------------------------------------------
+    def generate_tiled(self, tile_size=256, workers=None, method='kruskal'):
+        """
+        :param tile_size: The width and height of a tile in cells.
+        :param workers: The number of processes, None uses every core and 1 runs in this process.
+        :param method: The method each tile is carved with, one of PERFECT_METHODS.
+        :return: Returns the wall grid, use get_maze() for the 2D array of strings.
+        """
+        if self.GRID != 'square':
+            raise ValueError("Tiled generation only works on square grids")
+        if tile_size < 1:
+            raise ValueError("The tile size must be at least 1, not %s" % tile_size)
+        if method not in PERFECT_METHODS:
+            raise ValueError("Tiled generation needs a perfect maze method, not %s" % method)
+        if self.masked:
+            raise ValueError("Tiled generation can not follow a mask")
+        if self.wrap:
+            raise ValueError("Tiled generation can not wrap around the edges")
+        width = self.width
+        walls = self.walls
+        c_width = width - 1
+        c_height = self.height - 1
 
-        visited_cells = [[0] * c_width + [1] for _ in range(c_height)] + [[1] * (c_width + 1)]
+        # -----------------------------------------------------------------------
+        # Tile corners and sizes, the last tile in a row or column takes what is
+        # left. Each tile's seed is derived from the maze seed and the tile's
+        # position, so the maze is the same for any number of workers.
+        # -----------------------------------------------------------------------
+        base_seed = self.seed if self.seed is not None else self.rng.getrandbits(64)
+        tile_xs = range(0, c_width, tile_size)
+        tile_ys = range(0, c_height, tile_size)
+        jobs = [(min(tile_size, c_width - x), min(tile_size, c_height - y), method,
+                 derive_seed(base_seed, 'tile', x, y))
+                for y in tile_ys for x in tile_xs]
 
-        # ---------------------------------------------------------------------------------
-        # Recursive back tracking implementation for generating the maze.
-        # ---------------------------------------------------------------------------------
-        def traverse(x, y):
+        # Copy every tile into the grid row by row as it comes back.
+        def copy_tiles(tiles):
             """
-            :param x: The x coordinate of a cell we are examining.
-            :param y: The y coordinate of a cell we are examining.
-            :return: A newly populated maze.
+            :param tiles: The carved tiles in the same order as the jobs.
+            :return: None
             """
-            # -------------------------------------------------------
-            # To ensure the maze is random we first need to select
-            # a random direction. The array has the directions which
-            # we shuffle and select the first in the array to use.
-            # -------------------------------------------------------
-            directions = ['N', 'E', 'W', 'S']
-            shuffle(directions)
-            dir_index = 0
-
-            # ----------------------------------------------------------------------------------------------------
-            # For a cell at x,y a random direction is chosen and is checked to see if it open or already visited.
-            # - If the cell in the the selected direction is open remove the wall and go to that cell.
-            # - If the cell has been visited in the chosen direction update the dir index to select a new direction.
-            # - If no new directions exist break the loop.
-            # ----------------------------------------------------------------------------------------------------
-
-            # Loops until a new direction is chosen or until all directions have been used.
-            while dir_index <= 4:
-                if dir_index == 4:
+            corners = ((x, y) for y in tile_ys for x in tile_xs)
+            for (tile_width, tile_height, _, _), tile, (x, y) in zip(jobs, tiles, corners):
+                for row in range(tile_height):
+                    cell = (y + row) * width + x
+                    walls[cell:cell + tile_width] = tile[row * tile_width:(row + 1) * tile_width]
+
+        if workers == 1:
+            copy_tiles(map(_carve_tile, jobs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                copy_tiles(executor.map(_carve_tile, jobs))
+
+        # -----------------------------------------------------------------------
+        # A maze over the tiles decides which seams are opened. Every passage
+        # to the east opens one random row of the seam, every passage to the
+        # north one random column.
+        # -----------------------------------------------------------------------
+        tile_maze = RandomMaze(len(tile_xs) + 1, len(tile_ys) + 1, seed=derive_seed(base_seed, 'seams'))
+        tile_maze._carve('kruskal')
+        rng = tile_maze.rng
+        for tile_y, y in enumerate(tile_ys):
+            for tile_x, x in enumerate(tile_xs):
+                flags = tile_maze.walls[tile_y * tile_maze.width + tile_x]
+                if not flags & EAST:
+                    row = y + rng.randrange(min(tile_size, c_height - y))
+                    walls[row * width + x + tile_size - 1] &= ~EAST
+                if not flags & NORTH:
+                    column = x + rng.randrange(min(tile_size, c_width - x))
+                    walls[y * width + column] &= ~NORTH
+
+        self._mark_endpoints()
+        return self.walls
+
+    # ---------------------------------------------------------------------------------
+    # Braiding adds loops to a generated maze. Every dead end of the grid is found at
+    # once by counting the open walls of all cells with NumPy array operations, and the
+    # chosen walls are removed in bulk through boolean masks, with no Python loop per
+    # cell. In 'walls' mode random walls between two cells of the maze are removed.
+    # ---------------------------------------------------------------------------------
+    def braid(self, fraction=1.0, mode='dead_ends'):
+        """
+        :param fraction: The share of dead ends (or walls) to open, from 0 to 1.
+        :param mode: 'dead_ends' opens one wall of each chosen dead end,
+                     'walls' removes random walls between cells of the maze.
+        :return: The number of walls removed.
+        """
+        if self.GRID != 'square':
+            raise ValueError("Braiding only works on square grids")
+        require_numpy("braid")
+        if mode not in ('dead_ends', 'walls'):
+            raise ValueError("Unknown braid mode: %s" % mode)
+        if self.wrap:
+            raise ValueError("Braiding can not wrap around the edges")
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        grid = np.frombuffer(self.walls, dtype=np.uint8).reshape(self.height, self.width)
+        inside = np.frombuffer(self.outside, dtype=np.uint8).reshape(self.height, self.width) == 0
+        keep_north = np.uint8(0xFF ^ NORTH)
+        keep_east = np.uint8(0xFF ^ EAST)
+
+        # Walls between two cells of the maze, indexed by the cell that stores them.
+        north_wall = inside & ((grid & NORTH) != 0)
+        north_wall[0, :] = False
+        north_wall[1:, :] &= inside[:-1, :]
+        east_wall = inside & ((grid & EAST) != 0)
+        east_wall[:, -1] = False
+        east_wall[:, :-1] &= inside[:, 1:]
+
+        if mode == 'walls':
+            north_wall &= rng.random(grid.shape) < fraction
+            east_wall &= rng.random(grid.shape) < fraction
+            grid[north_wall] &= keep_north
+            grid[east_wall] &= keep_east
+            return int(north_wall.sum() + east_wall.sum())
+
+        # Passages and removable walls around every cell, in N, E, W, S order.
+        neighbor_inside = np.zeros((4,) + grid.shape, dtype=bool)
+        neighbor_inside[N, 1:, :] = inside[:-1, :]
+        neighbor_inside[E, :, :-1] = inside[:, 1:]
+        neighbor_inside[W, :, 1:] = inside[:, :-1]
+        neighbor_inside[S, :-1, :] = inside[1:, :]
+        removable = np.zeros_like(neighbor_inside)
+        removable[N] = north_wall
+        removable[E] = east_wall
+        removable[W, :, 1:] = east_wall[:, :-1]
+        removable[S, :-1, :] = north_wall[1:, :]
+        passages = inside & neighbor_inside & ~removable
+
+        # A dead end has a single passage, each is picked with the given chance.
+        dead_ends = (passages.sum(axis=0) == 1) & removable.any(axis=0) & (rng.random(grid.shape) < fraction)
+
+        # A random removable wall for every chosen dead end.
+        choice = np.argmax(rng.random(removable.shape) * removable, axis=0)
+        # Moved onto the cells that store them, two neighboring dead ends can pick the same wall.
+        open_north = dead_ends & (choice == N)
+        open_east = dead_ends & (choice == E)
+        open_north[1:, :] |= dead_ends[:-1, :] & (choice[:-1, :] == S)
+        open_east[:, :-1] |= dead_ends[:, 1:] & (choice[:, 1:] == W)
+        grid[open_north] &= keep_north
+        grid[open_east] &= keep_east
+        return int(open_north.sum() + open_east.sum())
+
+    # ------------------------------------------------------------------------------------------
+    # Before the maze is returned the goal is carved, in this case its assumed to be the bottom.
+    # Due to the nature of the maze we only need to remove the north wall to create a goal.
+    # The goal and start are looked up as [goal_x][goal_y] and [start_x][start_y] like the
+    # original string grid did.
+    # ------------------------------------------------------------------------------------------
+    def _mark_endpoints(self):
+        """
+        :return: None
+        """
+        goal = self._goal_cell()
+        # The open north wall is the exit, a wrapped maze has no outer wall to open.
+        if self.wrap:
+            self.walls[goal] |= GOAL
+        else:
+            self.walls[goal] = (self.walls[goal] & ~NORTH) | GOAL
+        # Note this part is entirely optional since the agent doesn't need to have a character for the start.
+        self.walls[self._start_cell()] |= START
+
+    # ---------------------------------------------------------------------------------
+    # Recursive back tracking implementation for generating the maze.
+    # ---------------------------------------------------------------------------------
+    def _traverse(self, cell, visited_cells):
+        """
+        :param cell: The index of the cell we are examining.
+        :param visited_cells: The flat visited array.
+        :return: None
+        """
+        # -------------------------------------------------------
+        # To ensure the maze is random we first need to select
+        # a random direction. The array has the directions which
+        # we shuffle and select the first in the array to use.
+        # -------------------------------------------------------
+        directions = list(self.DIRECTIONS)
+        self.rng.shuffle(directions)
+        dir_index = 0
+        count = len(directions)
+        links = self._links()
+        walls = self.walls
+        on_carve = self._on_carve
+
+        # ----------------------------------------------------------------------------------------------------
+        # For a cell a random direction is chosen and is checked to see if it open or already visited.
+        # - If the cell in the the selected direction is open remove the wall and go to that cell.
+        # - If the cell has been visited in the chosen direction update the dir index to select a new direction.
+        # - If no new directions exist the loop ends.
+        # The visited border means no bounds checks are needed here.
+        # ----------------------------------------------------------------------------------------------------
+        while dir_index < count:
+            offset, wall_offset, flag = links[directions[dir_index]]
+            next_cell = cell + offset
+            if visited_cells[next_cell] == 1:
+                dir_index += 1
+            # Otherwise the cell has not been visited, carve a path and update coordinates.
+            else:
+                walls[cell + wall_offset] &= ~flag
+                visited_cells[next_cell] = 1
+                if on_carve is not None:
+                    on_carve(cell % self.width, cell // self.width, directions[dir_index])
+                cell = next_cell
+                self._traverse(cell, visited_cells)
+
+    # ---------------------------------------------------------------------------------
+    # Iterative back tracking, an explicit stack replaces the call stack of traverse.
+    # Each frame holds a cell, its shuffled directions and how many of them are used up.
+    # Like traverse, a frame moves along with the cell it carves into, so the same
+    # sequence of shuffles carves exactly the same maze.
+    # ---------------------------------------------------------------------------------
+    def _traverse_iterative(self, cell, visited_cells, state=None):
+        """
+        :param cell: The index of the starting cell.
+        :param visited_cells: The flat visited array.
+        :param state: The stack saved in a checkpoint, None starts from the cell.
+        :return: None
+        """
+        links = self._links()
+        walls = self.walls
+        rng = self.rng
+        width = self.width
+        on_carve = self._on_carve
+        checkpoint_every = self._checkpoint[1] if self._checkpoint else 0
+        countdown = checkpoint_every
+
+        # The stack is kept in flat arrays, one direction byte per direction for every frame.
+        all_directions = self.DIRECTIONS
+        count = len(all_directions)
+        if state is None:
+            stack_cells = array('i', [cell])
+            stack_index = bytearray(1)
+            directions = list(all_directions)
+            rng.shuffle(directions)
+            stack_dirs = bytearray(directions)
+        else:
+            stack_cells = state['stack_cells']
+            stack_index = state['stack_index']
+            stack_dirs = state['stack_dirs']
+
+        while stack_cells:
+            top = len(stack_cells) - 1
+            dir_index = stack_index[top]
+
+            # All directions have been used, backtrack to the previous frame.
+            if dir_index == count:
+                stack_cells.pop()
+                stack_index.pop()
+                del stack_dirs[-count:]
+                continue
+
+            cell = stack_cells[top]
+            offset, wall_offset, flag = links[stack_dirs[count * top + dir_index]]
+            next_cell = cell + offset
+            if visited_cells[next_cell] == 1:
+                stack_index[top] = dir_index + 1
+                continue
+
+            walls[cell + wall_offset] &= ~flag
+            visited_cells[next_cell] = 1
+            if on_carve is not None:
+                on_carve(cell % width, cell // width, stack_dirs[count * top + dir_index])
+
+            # Move the current frame and push a new one for the next cell.
+            stack_cells[top] = next_cell
+            stack_cells.append(next_cell)
+            stack_index.append(0)
+            directions = list(all_directions)
+            rng.shuffle(directions)
+            stack_dirs.extend(directions)
+
+            if countdown:
+                countdown -= 1
+                if not countdown:
+                    self._save_checkpoint({'visited_cells': visited_cells, 'stack_cells': stack_cells,
+                                           'stack_index': stack_index, 'stack_dirs': stack_dirs})
+                    countdown = checkpoint_every
+
+    # ---------------------------------------------------------------------------------
+    # Fast back tracking. Each frame stores its cell, the number of one of the 24 direction
+    # orders and how many directions it has tried. Order numbers come from a block of
+    # random bytes that is refilled only when it runs out, and directions are integer codes
+    # looked up in flat tables, so no list is built or shuffled per cell. Unlike traverse
+    # a frame stays on its own cell, so this is the textbook back tracker and the start
+    # cell is marked visited.
+    # ---------------------------------------------------------------------------------
+    def _traverse_fast(self, cell, visited_cells, state=None):
+        """
+        :param cell: The index of the starting cell.
+        :param visited_cells: The flat visited array.
+        :param state: The stack and random block saved in a checkpoint, None starts from the cell.
+        :return: None
+        """
+        links = self._links()
+        offsets = tuple(link[0] for link in links)
+        wall_offsets = tuple(link[1] for link in links)
+        flags = tuple(~link[2] for link in links)
+        walls = self.walls
+        rng = self.rng
+        width = self.width
+        on_carve = self._on_carve
+        checkpoint_every = self._checkpoint[1] if self._checkpoint else 0
+        countdown = checkpoint_every
+
+        if state is None:
+            orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+            order_index = 1
+            visited_cells[cell] = 1
+
+            stack_cells = array('i', [cell])
+            stack_orders = bytearray([4 * orders[0]])
+            stack_index = bytearray(1)
+        else:
+            orders = state['orders']
+            order_index = state['order_index']
+            stack_cells = state['stack_cells']
+            stack_orders = state['stack_orders']
+            stack_index = state['stack_index']
+
+        while stack_cells:
+            top = len(stack_cells) - 1
+            dir_index = stack_index[top]
+
+            # All directions have been used, backtrack to the previous frame.
+            if dir_index == 4:
+                stack_cells.pop()
+                stack_orders.pop()
+                stack_index.pop()
+                continue
+
+            stack_index[top] = dir_index + 1
+            cell = stack_cells[top]
+            direction = PERMUTATIONS[stack_orders[top] + dir_index]
+            next_cell = cell + offsets[direction]
+            if visited_cells[next_cell]:
+                continue
+
+            walls[cell + wall_offsets[direction]] &= flags[direction]
+            visited_cells[next_cell] = 1
+            if on_carve is not None:
+                on_carve(cell % width, cell // width, direction)
+
+            if order_index == len(orders):
+                orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+                order_index = 0
+            stack_cells.append(next_cell)
+            stack_orders.append(4 * orders[order_index])
+            stack_index.append(0)
+            order_index += 1
+
+            if countdown:
+                countdown -= 1
+                if not countdown:
+                    self._save_checkpoint({'visited_cells': visited_cells, 'orders': orders,
+                                           'order_index': order_index, 'stack_cells': stack_cells,
+                                           'stack_orders': stack_orders, 'stack_index': stack_index})
+                    countdown = checkpoint_every
+
+    # ---------------------------------------------------------------------------------
+    # Growing tree, the maze grows from a list of active cells. Each step picks an active
+    # cell, newest, oldest or at random according to the policy weights, and carves into
+    # one of its unvisited neighbors, which becomes active. A cell with no unvisited
+    # neighbors leaves the list. The list is a flat array where the oldest cells sit at a
+    # moving head, so taking the newest or oldest cell is O(1) and taking one from the
+    # middle swaps the last cell into its place.
+    # ---------------------------------------------------------------------------------
+    def _growing_tree(self, cell, visited_cells, weights, state=None):
+        """
+        :param cell: The index of the starting cell.
+        :param visited_cells: The flat visited array.
+        :param weights: The (newest, random, oldest) weights of the cell selection.
+        :param state: The active list and random block saved in a checkpoint, None starts from the cell.
+        :return: None
+        """
+        links = self._links()
+        offsets = tuple(link[0] for link in links)
+        wall_offsets = tuple(link[1] for link in links)
+        flags = tuple(~link[2] for link in links)
+        walls = self.walls
+        rng = self.rng
+        width = self.width
+        on_carve = self._on_carve
+        checkpoint_every = self._checkpoint[1] if self._checkpoint else 0
+        countdown = checkpoint_every
+
+        # Thresholds on a random number in [0, 1) that choose the kind of pick.
+        total = sum(weights)
+        newest_below = weights[0] / total
+        random_below = (weights[0] + weights[1]) / total
+
+        if state is None:
+            orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+            order_index = 0
+            visited_cells[cell] = 1
+            active = array('i', [cell])
+            head = 0
+        else:
+            orders = state['orders']
+            order_index = state['order_index']
+            active = state['active']
+            head = state['head']
+
+        while head < len(active):
+            last = len(active) - 1
+            pick = rng.random()
+            if pick < newest_below:
+                index = last
+            elif pick < random_below:
+                index = head + int(rng.random() * (last + 1 - head))
+            else:
+                index = head
+            cell = active[index]
+
+            # Try the directions in a random order until one leads to an unvisited cell.
+            if order_index == len(orders):
+                orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+                order_index = 0
+            order = 4 * orders[order_index]
+            order_index += 1
+            for direction in PERMUTATIONS[order:order + 4]:
+                next_cell = cell + offsets[direction]
+                if not visited_cells[next_cell]:
+                    walls[cell + wall_offsets[direction]] &= flags[direction]
+                    visited_cells[next_cell] = 1
+                    active.append(next_cell)
+                    if on_carve is not None:
+                        on_carve(cell % width, cell // width, direction)
+
+                    if countdown:
+                        countdown -= 1
+                        if not countdown:
+                            self._save_checkpoint({'visited_cells': visited_cells, 'orders': orders,
+                                                   'order_index': order_index, 'active': active, 'head': head})
+                            countdown = checkpoint_every
                     break
-                selected_dir = directions[dir_index]
-
-                # North - remove the wall north if it has not been visited.
-                # Do not remove the wall if you are as far north as you can go
-                if selected_dir.__eq__('N'):
-                    # If the cell has already been visited update the dir_index
-                    if visited_cells[y - 1][x] == 1 or y == 0:
-                        dir_index += 1
-                    # Otherwise the cell has not been visited, carve a path and update coordinates.
-                    else:
-                        s = self.maze[y][x].replace("¯", " ")
-                        self.maze[y][x] = s
-                        visited_cells[y - 1][x] = 1
-                        y -= 1
-                        traverse(x, y)
-
-                # East - remove the wall to the east if it has not been visited.
-                # Do not remove the wall if you are at the eastern most side.
-                elif selected_dir.__eq__('E'):
-                    # If the cell has already been visited update the dir_index
-                    if visited_cells[y][x + 1] == 1 or x == self.width - 1:
-                        dir_index += 1
-                    # Otherwise the cell has not been visited, carve a path and update coordinates.
-                    else:
-                        s = self.maze[y][x].replace("|", " ")
-                        self.maze[y][x] = s
-                        visited_cells[y][x + 1] = 1
-                        x += 1
-                        traverse(x, y)
-
-                # West - remove the wall from the adjacent cell if it has not been visited.
-                # Do not remove the wall if you are at the western most side.
-                elif selected_dir.__eq__('W'):
-                    if visited_cells[y][x - 1] == 1 or x == 0:
-                        dir_index += 1
-                    # Otherwise the cell has not been visited, carve a path and update coordinates.
-                    else:
-                        s = self.maze[y][x - 1].replace("|", " ")
-                        self.maze[y][x - 1] = s
-                        visited_cells[y][x - 1] = 1
-                        x -= 1
-                        traverse(x, y)
-
-                # South - remove the wall from the bottom cell if it has not been visited.
-                # Do not remove the wall if you are at the southernmost side.
-                elif selected_dir.__eq__('S'):
-                    if visited_cells[y + 1][x] == 1 or y == self.height - 1:
-                        dir_index += 1
-                    # Otherwise the cell has not been visited, carve a path and update coordinates.
-                    else:
-                        s = self.maze[y + 1][x].replace("¯", " ")
-                        self.maze[y + 1][x] = s
-                        visited_cells[y + 1][x] = 1
-                        y += 1
-                        traverse(x, y)
-
-            # Printing for debugging purposes, uncomment to see parts of the maze generation
-            # print("Direction: ", directions[0], "Point: ", x, ",", y)
-            # print_maze(maze)
-            # print("")
-
-        traverse(self.start_x, self.start_y)
-
-        # ------------------------------------------------------------------------------------------
-        # Before the maze is returned the goal is carved, in this case its assumed to be the bottom.
-        # Due to the nature of the maze we only need to remove the north wall to create a goal.
-        # ------------------------------------------------------------------------------------------
-        self.maze[self.goal_x][self.goal_y] = self.maze[self.goal_y][self.goal_x].replace("¯", "G")
-        if self.maze[self.start_x][self.start_y].__contains__("¯"):
-            # Note this part is entirely optional since the agent doesn't need to have a character for the start.
-            self.maze[self.start_x][self.start_y] = self.maze[self.start_x][self.start_y].replace("¯", "S")
+            else:
+                # No unvisited neighbors are left, take the cell out of the active list.
+                if index == last:
+                    active.pop()
+                elif index == head:
+                    head += 1
+                else:
+                    active[index] = active.pop()
+
+                # Drop the retired front of the list once it is most of the array.
+                if head > 4096 and 2 * head > len(active):
+                    del active[:head]
+                    head = 0
+
+    # ---------------------------------------------------------------------------------
+    # Randomized Prim's algorithm. The frontier holds every cell next to the maze, in a
+    # flat array with a second array giving each cell's position in it, so a random
+    # frontier cell is picked and swapped out in O(1). For every frontier cell a bitmask
+    # records the directions that lead into the maze, and one of them is carved when the
+    # cell joins the maze.
+    # ---------------------------------------------------------------------------------
+    def _prim(self, cell, visited_cells, state=None):
+        """
+        :param cell: The index of the starting cell.
+        :param visited_cells: The flat visited array.
+        :param state: The frontier saved in a checkpoint, None starts from the cell.
+        :return: None
+        """
+        links = self._links()
+        offsets = tuple(link[0] for link in links)
+        wall_offsets = tuple(link[1] for link in links)
+        flags = tuple(~link[2] for link in links)
+        walls = self.walls
+        rng = self.rng
+        width = self.width
+        on_carve = self._on_carve
+        size = len(walls)
+        directions = self.DIRECTIONS
+        last_direction = len(directions) - 1
+        checkpoint_every = self._checkpoint[1] if self._checkpoint else 0
+        countdown = checkpoint_every
+
+        if state is None:
+            frontier = array('i')
+            position = array('i', [-1]) * size
+            connections = bytearray(size)
         else:
-            self.maze[self.start_x][self.start_y] = self.maze[self.start_x][self.start_y].replace(" ", "S")
-        return self.maze
+            frontier = state['frontier']
+            position = state['position']
+            connections = state['connections']
+
+        def add_neighbors(cell):
+            """
+            :param cell: A cell that was just added to the maze.
+            :return: None
+            """
+            visited_cells[cell] = 1
+            for direction in directions:
+                next_cell = cell + offsets[direction]
+                if not visited_cells[next_cell]:
+                    # The opposite of a direction code is the last code minus the code.
+                    connections[next_cell] |= 1 << (last_direction - direction)
+                    if position[next_cell] < 0:
+                        position[next_cell] = len(frontier)
+                        frontier.append(next_cell)
+
+        if state is None:
+            add_neighbors(cell)
+        while frontier:
+            # Swap a random frontier cell out with the last one.
+            index = int(rng.random() * len(frontier))
+            cell = frontier[index]
+            last = frontier.pop()
+            if last != cell:
+                frontier[index] = last
+                position[last] = index
+
+            # Join the maze through one of the directions that leads into it.
+            choices = MASK_DIRECTIONS[connections[cell]]
+            direction = choices[int(rng.random() * len(choices))]
+            walls[cell + wall_offsets[direction]] &= flags[direction]
+            if on_carve is not None:
+                on_carve(cell % width, cell // width, direction)
+            add_neighbors(cell)
+
+            if countdown:
+                countdown -= 1
+                if not countdown:
+                    self._save_checkpoint({'visited_cells': visited_cells, 'frontier': frontier,
+                                           'position': position, 'connections': connections})
+                    countdown = checkpoint_every
+
+    # ---------------------------------------------------------------------------------
+    # Recursive division, the grid starts without inner walls and chambers are split in
+    # two by a wall with a single gap until every chamber is one cell wide. Chambers wait
+    # on a work list instead of the call stack. A wall is laid with one bytes.translate
+    # over a row slice, or a column slice stepping by the width, so the cost follows the
+    # number of walls rather than the number of cells.
+    # ---------------------------------------------------------------------------------
+    def _divide(self):
+        """
+        :return: None
+        """
+        width = self.width
+        c_width = width - 1
+        c_height = self.height - 1
+        walls = self.walls
+        rng = self.rng
+
+        # An open grid, only the outer walls and the bordering last row and column remain.
+        border = bytes([NORTH | EAST])
+        top_row = bytes([NORTH]) * (c_width - 1) + border + border
+        inner_row = bytes(c_width - 1) + bytes([EAST]) + border
+        walls[:] = top_row + inner_row * (c_height - 1) + border * width
+
+        # Chambers as (x, y, width, height).
+        chambers = [(0, 0, c_width, c_height)]
+        while chambers:
+            x, y, chamber_width, chamber_height = chambers.pop()
+            if chamber_width < 2 and chamber_height < 2:
+                continue
+
+            # Split across the longer side, a square chamber is split either way.
+            if chamber_height > chamber_width or (chamber_height == chamber_width and rng.random() < 0.5):
+                # A horizontal wall on the north side of row y + split with a gap in one column.
+                split = rng.randrange(1, chamber_height)
+                start = (y + split) * width + x
+                walls[start:start + chamber_width] = walls[start:start + chamber_width].translate(ADD_NORTH)
+                walls[start + rng.randrange(chamber_width)] &= ~NORTH
+                chambers.append((x, y, chamber_width, split))
+                chambers.append((x, y + split, chamber_width, chamber_height - split))
+            else:
+                # A vertical wall on the east side of column x + split - 1 with a gap in one row.
+                split = rng.randrange(1, chamber_width)
+                start = y * width + x + split - 1
+                stop = start + chamber_height * width
+                walls[start:stop:width] = walls[start:stop:width].translate(ADD_EAST)
+                walls[start + rng.randrange(chamber_height) * width] &= ~EAST
+                chambers.append((x, y, split, chamber_height))
+                chambers.append((x + split, y, chamber_width - split, chamber_height))
+
+    # ---------------------------------------------------------------------------------
+    # Hunt and kill, a random walk carves until it has no unvisited neighbors, then the
+    # grid is hunted for an unvisited cell next to the maze and the walk starts again
+    # from there. A count of unvisited cells per row lets the hunt skip finished rows,
+    # and every row above the first unfinished one is finished, so the hunt starts there
+    # and never goes back.
+    # ---------------------------------------------------------------------------------
+    def _hunt_and_kill(self, cell, visited_cells):
+        """
+        :param cell: The index of the starting cell.
+        :param visited_cells: The flat visited array.
+        :return: None
+        """
+        links = self._links()
+        offsets = tuple(link[0] for link in links)
+        wall_offsets = tuple(link[1] for link in links)
+        flags = tuple(~link[2] for link in links)
+        walls = self.walls
+        rng = self.rng
+        on_carve = self._on_carve
+        width = self.width
+        height = self.height
+
+        # Cells outside the maze are visited from the start, keep them apart from the maze.
+        outside = bytes(visited_cells)
+        unvisited = array('i', (visited_cells[row:row + width].count(0) for row in range(0, len(walls), width)))
+        hunt_row = 0
+
+        orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+        order_index = 0
+
+        while cell >= 0:
+            # Kill, walk from the cell until there is nowhere left to go.
+            while cell >= 0:
+                if not visited_cells[cell]:
+                    visited_cells[cell] = 1
+                    unvisited[cell // width] -= 1
+                if order_index == len(orders):
+                    orders = rng.randbytes(4096).translate(PERMUTATION_TABLE, PERMUTATION_REJECT)
+                    order_index = 0
+                order = 4 * orders[order_index]
+                order_index += 1
+                for direction in PERMUTATIONS[order:order + 4]:
+                    next_cell = cell + offsets[direction]
+                    if not visited_cells[next_cell]:
+                        walls[cell + wall_offsets[direction]] &= flags[direction]
+                        if on_carve is not None:
+                            on_carve(cell % width, cell // width, direction)
+                        cell = next_cell
+                        break
+                else:
+                    cell = -1
+
+            # Hunt, find an unvisited cell next to the maze and carve into the maze from it.
+            while hunt_row < height and unvisited[hunt_row] == 0:
+                hunt_row += 1
+            for row in range(hunt_row, height):
+                if unvisited[row] == 0:
+                    continue
+                end = (row + 1) * width
+                found = visited_cells.find(0, row * width, end)
+                while found >= 0 and cell < 0:
+                    for direction in (N, E, W, S):
+                        next_cell = found + offsets[direction]
+                        if visited_cells[next_cell] and not outside[next_cell]:
+                            walls[found + wall_offsets[direction]] &= flags[direction]
+                            if on_carve is not None:
+                                on_carve(found % width, found // width, direction)
+                            cell = found
+                            break
+                    else:
+                        found = visited_cells.find(0, found + 1, end)
+                if cell >= 0:
+                    break
+
+    # ---------------------------------------------------------------------------------
+    # Kruskal's algorithm, every interior wall is shuffled once and removed whenever the
+    # cells on either side of it are not yet connected. Connected cells are tracked with
+    # a union-find kept in flat arrays, using path halving and union by rank.
+    # ---------------------------------------------------------------------------------
+    def _kruskal(self, visited_cells):
+        """
+        :param visited_cells: The flat visited array, only unvisited cells are joined.
+        :return: None
+        """
+        width = self.width
+        walls = self.walls
+        on_carve = self._on_carve
+        rng = self.rng
+        size = len(walls)
+
+        # ------------------------------------------------------------------
+        # A wall is numbered by the cell that stores it shifted left, with
+        # the direction code of the wall in the low bits. Only walls between
+        # two open cells can be removed.
+        # ------------------------------------------------------------------
+        links = self._links()
+        offsets = tuple(link[0] for link in links)
+        flags = tuple(~link[2] for link in links)
+        owned = tuple((direction, offsets[direction]) for direction in self.DIRECTIONS[:len(links) // 2])
+        shift = 2 if len(links) <= 4 else 3
+        low_bits = (1 << shift) - 1
+        edges = array('i')
+        open_cells = 0
+        for cell in range(size):
+            if visited_cells[cell] == 0:
+                open_cells += 1
+                for direction, offset in owned:
+                    if visited_cells[cell + offset] == 0:
+                        edges.append(cell << shift | direction)
+
+        # ------------------------------------------------------------------
+        # The walls on a wrapped edge are added on their own. Their steps land
+        # on the bordering last row or column, and each of those border cells
+        # starts out in the set of the cell across the maze, so the union-find
+        # below joins the right sets without knowing about the wrap. A step
+        # north from the top row gives a negative index, which the loop below
+        # passes to find() as is. Python reads it as the cell of the last row
+        # size cells further on, the same entry set here with % size.
+        # ------------------------------------------------------------------
+        parent = array('i', range(size))
+        rank = bytearray(size)
+        crossings = self._crossings()
+        for direction, offset in owned:
+            for cell, (next_cell, _) in crossings[direction].items():
+                if visited_cells[cell] == 0 and visited_cells[next_cell] == 0:
+                    edges.append(cell << shift | direction)
+                    parent[(cell + offset) % size] = next_cell
+        rng.shuffle(edges)
+
+        def find(cell):
+            """
+            :param cell: The cell to look up.
+            :return: The root of the set holding the cell.
+            """
+            while parent[cell] != cell:
+                parent[cell] = parent[parent[cell]]
+                cell = parent[cell]
+            return cell
+
+        # A spanning tree over the open cells has one less passage than there are cells.
+        remaining = open_cells - 1
+        for edge in edges:
+            if remaining <= 0:
+                break
+            cell = edge >> shift
+            direction = edge & low_bits
+            neighbor = cell + offsets[direction]
+
+            root_a = find(cell)
+            root_b = find(neighbor)
+            if root_a == root_b:
+                continue
+
+            # Union by rank, the shallower tree is hung under the deeper one.
+            if rank[root_a] < rank[root_b]:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+            if rank[root_a] == rank[root_b]:
+                rank[root_a] += 1
+
+            walls[cell] &= flags[direction]
+            remaining -= 1
+            if on_carve is not None:
+                on_carve(cell % width, cell // width, direction)
+
+    # ---------------------------------------------------------------------------------
+    # Wilson's algorithm, every maze is equally likely. Starting from a cell outside the
+    # maze a random walk runs until it reaches the maze, recording only the direction it
+    # last left each cell in. Following those directions from the first cell gives the
+    # walk with its loops already erased, and that path is carved into the maze.
+    # ---------------------------------------------------------------------------------
+    def _wilson(self, start, visited_cells):
+        """
+        :param start: The index of the cell the maze grows from.
+        :param visited_cells: The flat visited array, visited cells are left out of the maze.
+        :return: None
+        """
+        links = self._links()
+        crossings = self._crossings()
+        walls = self.walls
+        width = self.width
+        on_carve = self._on_carve
+        rng = self.rng
+        size = len(walls)
+
+        # Cells already in the maze, the border cells are kept apart in visited_cells.
+        in_maze = bytearray(size)
+        in_maze[start] = 1
+        next_dir = bytearray(size)
+
+        # -----------------------------------------------------------------
+        # Random directions are drawn a block at a time, the low bits of each
+        # byte give the step. With more than four directions three bits are
+        # used and the bytes naming no direction are dropped.
+        # -----------------------------------------------------------------
+        count = len(self.DIRECTIONS)
+        low_bits = 3 if count <= 4 else 7
+        steps = bytes(value & low_bits for value in range(256))
+        no_step = bytes(value for value in range(256) if value & low_bits >= count)
+        block = rng.randbytes(4096).translate(steps, no_step)
+        block_size = len(block)
+        block_index = 0
+
+        for cell in range(size):
+            if in_maze[cell] or visited_cells[cell]:
+                continue
+
+            # Walk until the maze is reached, overwriting the direction out of every cell.
+            current = cell
+            while not in_maze[current]:
+                if block_index == block_size:
+                    block = rng.randbytes(4096).translate(steps, no_step)
+                    block_size = len(block)
+                    block_index = 0
+                direction = block[block_index]
+                block_index += 1
+                next_cell = current + links[direction][0]
+                if visited_cells[next_cell] and not in_maze[next_cell]:
+                    # Only a wrapped edge lets the walk through, to the cell across it.
+                    next_cell = crossings[direction].get(current, (next_cell,))[0]
+                    if visited_cells[next_cell] and not in_maze[next_cell]:
+                        continue
+                next_dir[current] = direction
+                current = next_cell
+
+            # Carve the loop-erased path into the maze.
+            current = cell
+            while not in_maze[current]:
+                direction = next_dir[current]
+                offset, wall_offset, flag = links[direction]
+                next_cell = current + offset
+                wall_cell = current + wall_offset
+                # A step across a wrapped edge lands on the border, its cells are looked up.
+                if visited_cells[next_cell] and not in_maze[next_cell]:
+                    next_cell, wall_cell = crossings[direction][current]
+                walls[wall_cell] &= ~flag
+                if on_carve is not None:
+                    on_carve(current % width, current // width, direction)
+                in_maze[current] = 1
+                current = next_cell
+
+    # ------------------------------------------------
+    # The cell the solvers start from and the cells the
+    # start and goal markers are stored in. The markers
+    # are looked up as [x][y] like the original string
+    # grid did, while the search starts at x, y.
+    # ------------------------------------------------
+    def _search_start(self):
+        """
+        :return: The index of the cell at start_x, start_y.
+        """
+        return self.start_y * self.width + self.start_x
+
+    def _start_cell(self):
+        """
+        :return: The index of the cell holding the START flag.
+        """
+        return self.start_x * self.width + self.start_y
+
+    def _goal_cell(self):
+        """
+        :return: The index of the cell holding the GOAL flag.
+        """
+        return self.goal_x * self.width + self.goal_y
+
+    # ------------------------------------------------
+    # Turns a cell index back into a point.
+    # ------------------------------------------------
+    def _point(self, cell, parent=None):
+        """
+        :param cell: The index of the cell.
+        :param parent: The point before it on the path.
+        :return: A Point with the cell's coordinates.
+        """
+        return Point(cell % self.width, cell // self.width, parent)
+
+    # ------------------------------------------------
+    # Builds the path from the goal back to the start by
+    # following the parents of the goal. The searches
+    # record every cell they reach in flat arrays of
+    # cells and parent entries, so points are only made
+    # for the cells on the path.
+    # ------------------------------------------------
+    def _trace_path(self, entry, entry_cells, entry_parents):
+        """
+        :param entry: The entry the goal was found at.
+        :param entry_cells: The cell of every entry.
+        :param entry_parents: The entry each entry was reached from, -1 for the start.
+        :return: A list of points from the goal back to the start.
+        """
+        cells = []
+        while entry >= 0:
+            cells.append(entry_cells[entry])
+            entry = entry_parents[entry]
+        path = []
+        parent = None
+        for cell in reversed(cells):
+            parent = self._point(cell, parent)
+            path.append(parent)
+        path.reverse()
+        return path
 
     # ------------------------------------------------
     # Creates a solution to the maze using breadth-first
     # searching.
     # ------------------------------------------------
-
     def solve_breadth_first(self):
         """
         :return: Returns a solution or a failure
         """
+        if self.wrap:
+            return self._solve_wrapped(self.BREADTH_FIRST_ORDER, False)
+        walls = self.walls
+        links = self._links()
 
-        # Starting point an and empty path to be returned as a solution
-        start_pt = Point(self.start_x, self.start_y)
-        path = []
-
-        # A 2D array to create visited and unvisited cells (0 = unvisited, 1 = visited)
-        c_width = self.width - 1
-        c_height = self.height - 1
-        visited_cells = [[0] * c_width + [1] for _ in range(c_height)] + [[1] * (c_width + 1)]
+        # A flat array to create visited and unvisited cells (0 = unvisited, 1 = visited)
+        visited_cells = self._new_visited()
 
         # Setting the goal point as unvisited.
-        visited_cells[self.goal_x][self.goal_y] = 0
+        visited_cells[self._goal_cell()] = 0
 
-        # A queue for the BFS, filled with the starting point
-        queue = [start_pt]
+        # --------------------------------------------------
+        # The queue for the BFS, every cell reached is added
+        # to the end of the entries with the entry it was
+        # reached from, and the head walks along them in
+        # order. It starts out with the starting point.
+        # --------------------------------------------------
+        entry_cells = array('i', [self._search_start()])
+        entry_parents = array('i', [-1])
+        head = 0
 
         # Marking the starting cell as visited.
-        visited_cells[self.start_x][self.start_y] = 1
-
-        # ------------------------------------------------
-        # Below is a function that helps the agent
-        # decide which direction it can go. If the chosen
-        # direction is open then the function returns true
-        # Otherwise it returns false.
-        # ------------------------------------------------
-        def reachable(x, y, direction):
-            """
-            :param x: The x coordinate of the current cell
-            :param y: The y coordinate of the current cell
-            :param direction: The selected direction (N,S,E,W)
-            :return: Boolean, true if there are no walls, false if there are.
-            """
-
-            # ------------------------------------------------------
-            # Heading north is a decrease in y,
-            # Don't go north if you are at y = 0
-            # Don't go north if the cell you are in has ¯ in it.
-            # Go north if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'N':
-                if y == 0:
-                    return False
-                elif self.maze[y][x].__contains__('¯'):
-                    return False
-                else:
-                    return True
-
-            # ------------------------------------------------------
-            # Heading east is an increase in x,
-            # Don't go east if you are at the width of the maze
-            # Don't go east if the cell you are in has | in it.
-            # Go east if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'E':
-                if x == self.width - 1:
-                    return False
-                elif self.maze[y][x].__contains__('|'):
-                    return False
-                else:
-                    return True
-
-            # ------------------------------------------------------
-            # Heading south is an increase in y,
-            # Don't go south if you are at the height of the maze
-            # Don't go south if the cell below you has a ¯ in it
-            # Go south if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'S':
-                if y == self.height - 1:
-                    return False
-                elif self.maze[y + 1][x].__contains__('¯'):
-                    return False
-                else:
-                    return True
-
-            # -----------------------------------------------------
-            # Heading west is a decrease in x,
-            # Don't go west if you are at 0
-            # Don't go west if the cell next you as as a | in it
-            # Go west if the above two are met.
-            # -----------------------------------------------------
-            if direction == 'W':
-                if y == 0:
-                    return False
-                elif self.maze[y][x - 1].__contains__('|'):
-                    return False
-                else:
-                    return True
+        visited_cells[self._start_cell()] = 1
 
         # ------------------------------------------------
         # Breadth first part of the solution
@@ -268,49 +1780,28 @@ class RandomMaze:
         # neighbors, while they exist add the neighbors to
         # The queue. Once the queue is empty or once a goal
         # point has been reached return the path.
+        # A direction is open when the wall flag between the
+        # two cells is clear, the visited border keeps the
+        # search inside the maze.
         # ----------------------------------------------
-        while queue:
+        while head < len(entry_cells):
 
-            # Test point in question as FIFO queue
-            test_pt = queue.pop(0)
-            test_x = test_pt.get_x()
-            test_y = test_pt.get_y()
+            # Test cell in question as FIFO queue
+            cell = entry_cells[head]
 
             # If we reach the goal at any point in time return the current path
-            if self.maze[test_y][test_x].__contains__("G"):
-                path.append(test_pt)
-                while test_pt.get_parent():
-                    path.append(test_pt.get_parent())
-                    test_pt = test_pt.get_parent()
-                return path
-
-            # Check North
-            if reachable(test_x, test_y, "N"):
-                if visited_cells[test_y - 1][test_x] == 0:
-                    visited_cells[test_y - 1][test_x] = 1
-                    next_pt = Point(test_x, test_y - 1, test_pt)
-                    queue.append(next_pt)
-
-            # Check South
-            if reachable(test_x, test_y, "S"):
-                if visited_cells[test_y + 1][test_x] == 0:
-                    visited_cells[test_y + 1][test_x] = 1
-                    next_pt = Point(test_x, test_y + 1, test_pt)
-                    queue.append(next_pt)
-
-            # Check East
-            if reachable(test_x, test_y, "E"):
-                if visited_cells[test_y][test_x + 1] == 0:
-                    visited_cells[test_y][test_x + 1] = 1
-                    next_pt = Point(test_x + 1, test_y, test_pt)
-                    queue.append(next_pt)
-
-            # Check West
-            if reachable(test_x, test_y, "W"):
-                if visited_cells[test_y][test_x - 1] == 0:
-                    visited_cells[test_y][test_x - 1] = 1
-                    next_pt = Point(test_x - 1, test_y, test_pt)
-                    queue.append(next_pt)
+            if walls[cell] & GOAL:
+                return self._trace_path(head, entry_cells, entry_parents)
+
+            # Check North, South, East and West
+            for direction in self.BREADTH_FIRST_ORDER:
+                offset, wall_offset, flag = links[direction]
+                next_cell = cell + offset
+                if not walls[cell + wall_offset] & flag and visited_cells[next_cell] == 0:
+                    visited_cells[next_cell] = 1
+                    entry_cells.append(next_cell)
+                    entry_parents.append(head)
+            head += 1
 
         # If the goal has not been found print a message and return nothing
         print("No goal found!")
@@ -323,137 +1814,120 @@ class RandomMaze:
         """
         :return: Returns a solution or a failure
         """
+        if self.wrap:
+            return self._solve_wrapped(self.DEPTH_FIRST_ORDER, True)
+        walls = self.walls
+        links = self._links()
 
-        # Like breadth first we have the starting point and an empty path
-        start_pt = Point(self.start_x, self.start_y)
-        path = []
-
-        # A 2D array to keep track of visited and unvisited cells
-        c_width = self.width - 1
-        c_height = self.height - 1
-        visited_cells = [[0] * c_width + [1] for _ in range(c_height)] + [[1] * (c_width + 1)]
+        # A flat array to keep track of visited and unvisited cells
+        visited_cells = self._new_visited()
 
         # Setting the goal point as unvisited
-        visited_cells[self.goal_x][self.goal_y] = 0
+        visited_cells[self._goal_cell()] = 0
 
-        # A stack for the DFS
-        stack = [start_pt]
+        # A stack for the DFS, holding entries recorded like in the breadth first search.
+        entry_cells = array('i', [self._search_start()])
+        entry_parents = array('i', [-1])
+        stack = array('i', [0])
 
         # Marking the starting cell as visited.
-        visited_cells[self.start_x][self.start_y] = 1
-
-        # Using reachable again, not the best practice here
-        def reachable(x, y, direction):
-            """
-            :param x: The x coordinate of the current cell
-            :param y: The y coordinate of the current cell
-            :param direction: The selected direction (N,S,E,W)
-            :return: Boolean, true if there are no walls, false if there are.
-            """
-
-            # ------------------------------------------------------
-            # Heading north is a decrease in y,
-            # Don't go north if you are at y = 0
-            # Don't go north if the cell you are in has ¯ in it.
-            # Go north if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'N':
-                if y == 0:
-                    return False
-                elif self.maze[y][x].__contains__('¯'):
-                    return False
-                else:
-                    return True
-
-            # ------------------------------------------------------
-            # Heading east is an increase in x,
-            # Don't go east if you are at the width of the maze
-            # Don't go east if the cell you are in has | in it.
-            # Go east if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'E':
-                if x == self.width - 1:
-                    return False
-                elif self.maze[y][x].__contains__('|'):
-                    return False
-                else:
-                    return True
-
-            # ------------------------------------------------------
-            # Heading south is an increase in y,
-            # Don't go south if you are at the height of the maze
-            # Don't go south if the cell below you has a ¯ in it
-            # Go south if the above two are met.
-            # ------------------------------------------------------
-            if direction == 'S':
-                if y == self.height - 1:
-                    return False
-                elif self.maze[y + 1][x].__contains__('¯'):
-                    return False
-                else:
-                    return True
-
-            # -----------------------------------------------------
-            # Heading west is a decrease in x,
-            # Don't go west if you are at 0
-            # Don't go west if the cell next you as as a | in it
-            # Go west if the above two are met.
-            # -----------------------------------------------------
-            if direction == 'W':
-                if y == 0:
-                    return False
-                elif self.maze[y][x - 1].__contains__('|'):
-                    return False
-                else:
-                    return True
+        visited_cells[self._start_cell()] = 1
 
         # Like the breadth first search we are looping until our stack is empty
         while stack:
 
             # Here is the difference, this is a LIFO queue while breadth uses a FIFO queue.
-            test_pt = stack.pop()
-            test_x = test_pt.get_x()
-            test_y = test_pt.get_y()
+            entry = stack.pop()
+            cell = entry_cells[entry]
 
             # If we reach the goal return the current path
-            if self.maze[test_y][test_x].__contains__("G"):
-                path.append(test_pt)
-                while test_pt.get_parent():
-                    path.append(test_pt.get_parent())
-                    test_pt = test_pt.get_parent()
-                return path
-
-            # Check North
-            if reachable(test_x, test_y, 'N'):
-                if visited_cells[test_y - 1][test_x] == 0:
-                    visited_cells[test_y - 1][test_x] = 1
-                    next_pt = Point(test_x, test_y - 1, test_pt)
-                    stack.append(next_pt)
-
-            # Check South
-            if reachable(test_x, test_y, 'S'):
-                if visited_cells[test_y + 1][test_x] == 0:
-                    visited_cells[test_y + 1][test_x] = 1
-                    next_pt = Point(test_x, test_y + 1, test_pt)
-                    stack.append(next_pt)
-
-            # Check East
-            if reachable(test_x, test_y, 'W'):
-                if visited_cells[test_y][test_x - 1] == 0:
-                    visited_cells[test_y][test_x - 1] = 1
-                    next_pt = Point(test_x - 1, test_y, test_pt)
-                    stack.append(next_pt)
-
-            # Check West
-            if reachable(test_x, test_y, 'E'):
-                if visited_cells[test_y][test_x + 1] == 0:
-                    visited_cells[test_y][test_x + 1] = 1
-                    next_pt = Point(test_x + 1, test_y, test_pt)
-                    stack.append(next_pt)
+            if walls[cell] & GOAL:
+                return self._trace_path(entry, entry_cells, entry_parents)
+
+            # Check North, South, West and East
+            for direction in self.DEPTH_FIRST_ORDER:
+                offset, wall_offset, flag = links[direction]
+                next_cell = cell + offset
+                if not walls[cell + wall_offset] & flag and visited_cells[next_cell] == 0:
+                    visited_cells[next_cell] = 1
+                    stack.append(len(entry_cells))
+                    entry_cells.append(next_cell)
+                    entry_parents.append(entry)
 
         print("No path found!")
         return None
 
+    # ------------------------------------------------
+    # Both searches for a maze that wraps around its
+    # edges, stepping through the neighbor tables. The
+    # queue is taken from the front for breadth first and
+    # from the back for depth first.
+    # ------------------------------------------------
+    def _solve_wrapped(self, order, depth_first):
+        """
+        :param order: The direction codes in the order they are tried.
+        :param depth_first: Search depth first instead of breadth first.
+        :return: Returns a solution or a failure
+        """
+        walls = self.walls
+        tables = self._neighbor_tables()
+        steps = tuple(tables[direction] for direction in order)
+
+        visited_cells = self._new_visited()
+        visited_cells[self._goal_cell()] = 0
+        entry_cells = array('i', [self._search_start()])
+        entry_parents = array('i', [-1])
+        visited_cells[self._start_cell()] = 1
+        pending = deque([0])
+        take = pending.pop if depth_first else pending.popleft
+
+        while pending:
+            entry = take()
+            cell = entry_cells[entry]
+            if walls[cell] & GOAL:
+                return self._trace_path(entry, entry_cells, entry_parents)
+            for next_cells, wall_cells, flag in steps:
+                next_cell = next_cells[cell]
+                if not walls[wall_cells[cell]] & flag and visited_cells[next_cell] == 0:
+                    visited_cells[next_cell] = 1
+                    pending.append(len(entry_cells))
+                    entry_cells.append(next_cell)
+                    entry_parents.append(entry)
+
+        print("No path found!" if depth_first else "No goal found!")
+        return None
+
+    # ------------------------------------------------
+    # Counts the steps from the start to every cell with
+    # a breadth first search, following wrapped edges
+    # through the neighbor tables like the solvers.
+    # ------------------------------------------------
+    def distances(self):
+        """
+        :return: A flat array('i') with the steps from the start to every cell, row after row,
+                 -1 for cells that can not be reached.
+        """
+        walls = self.walls
+        tables = self._neighbor_tables()
+        visited_cells = self._new_visited()
+        start = self._search_start()
+        visited_cells[start] = 1
+
+        steps = array('i', [-1]) * len(walls)
+        steps[start] = 0
+        queue = array('i', [start])
+        head = 0
+        while head < len(queue):
+            cell = queue[head]
+            head += 1
+            for next_cells, wall_cells, flag in tables:
+                next_cell = next_cells[cell]
+                if not walls[wall_cells[cell]] & flag and visited_cells[next_cell] == 0:
+                    visited_cells[next_cell] = 1
+                    steps[next_cell] = steps[cell] + 1
+                    queue.append(next_cell)
+        return steps
+
     # --------------------------------
     # Prints the maze as a 2D array.
     # --------------------------------
@@ -462,11 +1936,7 @@ class RandomMaze:
         """
         :return: None
         """
-        row_length = len(self.maze)
-        # This isn't entirely correct but if the map is square we can get away with it.
-        col_length = len(self.maze)
-        for row in range(row_length):
-            for col in range(col_length):
-                print(self.maze[row][col], end='')
-            print('')
+        width = self.width
+        for row in range(0, width * self.height, width):
+            print(''.join([self._cell_strings[flags] for flags in self.walls[row:row + width]]))
         return None
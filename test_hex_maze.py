@@ -0,0 +1,54 @@
+import pytest
+
+from hex_maze import HEX_METHODS, NORTH_EAST, HexMaze
+from random_maze import EAST, METHODS, NORTH
+
+
+# Counts the open walls between two cells, each cell owns its north west, east and north east walls.
+def passages(maze):
+    width = maze.width
+    walls = maze.walls
+    outside = maze.outside
+    count = 0
+    for cell in range(len(walls)):
+        if outside[cell]:
+            continue
+        for next_cell, flag in ((cell - width, NORTH), (cell + 1, EAST), (cell + 1 - width, NORTH_EAST)):
+            if next_cell >= 0 and not outside[next_cell] and not walls[cell] & flag:
+                count += 1
+    return count
+
+
+@pytest.mark.parametrize('method', [method for method in HEX_METHODS if method not in ('iterative', 'recursive')])
+def test_hex_methods_carve_a_spanning_tree(method):
+    for seed in range(3):
+        maze = HexMaze(10, 8, seed=seed)
+        maze.generate_maze(method)
+        cells = maze.outside.count(0)
+        assert passages(maze) == cells - 1
+        assert sum(1 for steps in maze.distances() if steps >= 0) == cells
+
+
+def test_hex_solvers_step_to_neighbors():
+    maze = HexMaze(9, 9, 0, 0, 6, 6, seed=2)
+    maze.generate_maze('kruskal')
+    for path in (maze.solve_breadth_first(), maze.solve_depth_first()):
+        assert (path[0].get_x(), path[0].get_y()) == (6, 6)
+        assert (path[-1].get_x(), path[-1].get_y()) == (0, 0)
+        for first, second in zip(path, path[1:]):
+            dx = second.get_x() - first.get_x()
+            dy = second.get_y() - first.get_y()
+            assert (abs(dx) + abs(dy) + abs(dx + dy)) // 2 == 1
+
+
+def test_square_only_features_raise():
+    for method in METHODS:
+        if method not in HEX_METHODS:
+            with pytest.raises(ValueError):
+                HexMaze(8, 8).generate_maze(method)
+    with pytest.raises(ValueError):
+        HexMaze(8, 8).generate_tiled()
+    with pytest.raises(ValueError):
+        HexMaze(8, 8).braid()
+    with pytest.raises(ValueError):
+        HexMaze(8, 8, wrap=True)
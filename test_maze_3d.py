@@ -0,0 +1,69 @@
+import pytest
+
+from maze_3d import METHODS_3D, UP, Maze3D
+from random_maze import EAST, METHODS, NORTH, RandomMaze
+
+
+# Counts the open walls between two cells, each cell owns its north, east and up walls.
+def passages(maze):
+    width = maze.width
+    floor_size = width * maze.height
+    walls = maze.walls
+    outside = maze.outside
+    count = 0
+    for cell in range(len(walls)):
+        if outside[cell]:
+            continue
+        for next_cell, flag in ((cell - width, NORTH), (cell + 1, EAST), (cell - floor_size, UP)):
+            if next_cell >= 0 and not outside[next_cell] and not walls[cell] & flag:
+                count += 1
+    return count
+
+
+@pytest.mark.parametrize('method', [method for method in METHODS_3D if method != 'iterative'])
+def test_3d_methods_carve_a_spanning_tree(method):
+    for seed in range(3):
+        maze = Maze3D(7, 6, 5, seed=seed)
+        maze.generate_maze(method)
+        cells = maze.outside.count(0)
+        assert passages(maze) == cells - 1
+        assert sum(1 for steps in maze.distances() if steps >= 0) == cells
+
+
+def test_3d_solvers_climb_between_floors():
+    maze = Maze3D(7, 7, 4, 0, 0, 0, 5, 4, 2, seed=1)
+    maze.generate_maze('prim')
+    for path in (maze.solve_breadth_first(), maze.solve_depth_first()):
+        steps = [(point.get_x(), point.get_y(), point.get_z()) for point in path]
+        assert steps[0] == (5, 4, 2) and steps[-1] == (0, 0, 0)
+        for first, second in zip(steps, steps[1:]):
+            assert sum(abs(a - b) for a, b in zip(first, second)) == 1
+
+
+def test_get_maze_has_a_list_per_floor():
+    maze = Maze3D(5, 4, 3, seed=1)
+    maze.generate_maze('kruskal')
+    floors = maze.get_maze()
+    assert len(floors) == 3 and all(len(rows) == 4 for rows in floors)
+
+
+def test_2d_only_features_raise(tmp_path):
+    for method in METHODS:
+        if method not in METHODS_3D:
+            with pytest.raises(ValueError):
+                Maze3D(5, 5, 3).generate_maze(method)
+    with pytest.raises(ValueError):
+        Maze3D(5, 5, 3).generate_maze('prim', checkpoint=str(tmp_path / 'maze.checkpoint'))
+    with pytest.raises(ValueError):
+        Maze3D(5, 5, 3).generate_tiled()
+    with pytest.raises(ValueError):
+        Maze3D(5, 5, 3).braid()
+
+
+def test_points_print_their_floor():
+    maze = Maze3D(5, 5, 3, 0, 0, 0, 3, 3, 1, seed=4)
+    maze.generate_maze('kruskal')
+    assert str(maze.solve_breadth_first()[0]) == "Point(3,3,1)"
+    flat = RandomMaze(5, 5, 0, 0, 3, 3, seed=4)
+    flat.generate_maze('kruskal')
+    assert str(flat.solve_breadth_first()[0]) == "Point(3,3)"
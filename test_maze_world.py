@@ -0,0 +1,43 @@
+from maze_world import MazeWorld
+from random_maze import N, E, W, S
+
+
+def test_worlds_with_the_same_seed_agree():
+    first = MazeWorld(chunk_size=8, seed=11)
+    second = MazeWorld(chunk_size=8, seed=11)
+    assert first.get_maze(-20, -20, 40, 40) == second.get_maze(-20, -20, 40, 40)
+    assert first.get_maze(-20, -20, 40, 40) != MazeWorld(chunk_size=8, seed=12).get_maze(-20, -20, 40, 40)
+
+
+def test_walls_agree_across_chunk_edges():
+    world = MazeWorld(chunk_size=8, seed=3)
+    for y in range(-16, 16):
+        for x in range(-16, 16):
+            assert world.is_open(x, y, E) == world.is_open(x + 1, y, W)
+            assert world.is_open(x, y, S) == world.is_open(x, y + 1, N)
+
+
+def test_every_chunk_edge_has_one_passage():
+    world = MazeWorld(chunk_size=8, seed=5)
+    for chunk in range(-3, 3):
+        assert sum(world.is_open(chunk * 8 + x, 0, N) for x in range(8)) == 1
+        assert sum(world.is_open(7, chunk * 8 + y, E) for y in range(8)) == 1
+
+
+def test_evicted_chunks_come_back_the_same():
+    world = MazeWorld(chunk_size=8, seed=9, cache_size=4)
+    first = world.get_chunk(0, 0)
+    for chunk in range(1, 10):
+        world.get_chunk(chunk, chunk)
+    assert len(world.chunks) == 4
+    assert (0, 0) not in world.chunks
+    assert world.get_chunk(0, 0) == first
+
+
+def test_recently_used_chunks_stay_cached():
+    world = MazeWorld(chunk_size=8, seed=9, cache_size=2)
+    world.get_chunk(0, 0)
+    world.get_chunk(1, 0)
+    world.get_chunk(0, 0)
+    world.get_chunk(2, 0)
+    assert list(world.chunks) == [(0, 0), (2, 0)]
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from random_cave import generate_cave
+
+
+def test_every_floor_cell_is_reachable():
+    for seed in range(5):
+        cave = generate_cave(50, 40, seed=seed)
+        floor = cave.outside.count(0)
+        assert floor > 0
+        assert sum(1 for steps in cave.distances() if steps >= 0) == floor
+
+
+# Caves wider than they are tall must start on a floor cell and still solve.
+@pytest.mark.parametrize('size', [(60, 6), (6, 60)])
+def test_narrow_caves_start_on_the_floor(size):
+    for seed in range(50):
+        cave = generate_cave(*size, seed=seed)
+        assert sum(1 for steps in cave.distances() if steps >= 0) == cave.outside.count(0)
+        path = cave.solve_breadth_first()
+        assert path
+        assert not cave.outside[path[-1].get_y() * cave.width + path[-1].get_x()]
+
+
+def test_same_seed_gives_same_cave():
+    assert generate_cave(30, 30, seed=3).walls == generate_cave(30, 30, seed=3).walls
+
+
+def test_small_caves_are_filled_in():
+    cave = generate_cave(60, 60, seed=1, min_size=30)
+    assert cave.solve_breadth_first() is not None
+
+
+def test_solid_rock_raises():
+    with pytest.raises(ValueError):
+        generate_cave(20, 20, seed=1, fill=1.0)
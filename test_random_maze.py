@@ -0,0 +1,335 @@
+import pytest
+
+from random_maze import (EAST, EVENT_METHODS, METHODS, NORTH, PERFECT_METHODS, RECTANGLE_METHODS, N, E, W, S,
+                         RandomMaze, load_mask, np)
+
+# The methods that carve a perfect maze, the back trackers keep the original one extra loop at the start.
+PERFECT = tuple(method for method in METHODS if method not in ('iterative', 'recursive'))
+
+# The methods that need NumPy.
+NUMPY_METHODS = ('binary_tree', 'sidewinder')
+
+# A ring with a cross bar, 15 x 11 including the bordering last row and column.
+RING = ["11111111111111 ",
+        "11111111111111 ",
+        "11000000000011 ",
+        "11000000000011 ",
+        "11111111111111 ",
+        "11000000000011 ",
+        "11000000000011 ",
+        "11111111111111 ",
+        "11111111111111 ",
+        "               ",
+        "               "]
+
+
+def ring_mask():
+    return [[1 if value == '1' else 0 for value in row] for row in RING]
+
+
+# ------------------------------------------------
+# Counts the open walls between two cells of the maze
+# and the cells the start can reach, from the public
+# wall grid, outside bytes and distances().
+# ------------------------------------------------
+def passages(maze):
+    width = maze.width
+    walls = maze.walls
+    outside = maze.outside
+    count = 0
+    for cell in range(len(walls)):
+        if outside[cell]:
+            continue
+        if cell >= width and not outside[cell - width] and not walls[cell] & NORTH:
+            count += 1
+        if not outside[cell + 1] and not walls[cell] & EAST:
+            count += 1
+    return count
+
+
+def cells(maze):
+    return maze.outside.count(0)
+
+
+def reached(maze):
+    return sum(1 for steps in maze.distances() if steps >= 0)
+
+
+def skip_without_numpy(method):
+    if method in NUMPY_METHODS and np is None:
+        pytest.skip("NumPy is not installed")
+
+
+@pytest.mark.parametrize('method', PERFECT)
+@pytest.mark.parametrize('size', [(12, 12), (17, 9), (5, 21), (2, 2)])
+def test_perfect_methods_carve_a_spanning_tree(method, size):
+    skip_without_numpy(method)
+    for seed in range(3):
+        maze = RandomMaze(*size, seed=seed)
+        maze.generate_maze(method)
+        assert passages(maze) == cells(maze) - 1
+        assert reached(maze) == cells(maze)
+
+
+@pytest.mark.parametrize('method', ['iterative', 'recursive'])
+def test_back_trackers_reach_every_cell(method):
+    for seed in range(3):
+        maze = RandomMaze(14, 11, seed=seed)
+        maze.generate_maze(method)
+        assert reached(maze) == cells(maze)
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        RandomMaze(5, 5).generate_maze('labyrinth')
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('size', [(20, 20), (31, 7)])
+def test_same_seed_gives_same_maze(method, size):
+    skip_without_numpy(method)
+    first = RandomMaze(*size, seed=42)
+    second = RandomMaze(*size, seed=42)
+    assert first.generate_maze(method) == second.generate_maze(method)
+    assert first.walls != RandomMaze(*size, seed=43).generate_maze(method)
+
+
+def test_solvers_walk_from_the_goal_to_the_start():
+    maze = RandomMaze(16, 16, 0, 0, 13, 13, seed=7)
+    maze.generate_maze('kruskal')
+    distances = maze.distances()
+    for path in (maze.solve_breadth_first(), maze.solve_depth_first()):
+        steps = [(point.get_x(), point.get_y()) for point in path]
+        assert steps[0] == (13, 13) and steps[-1] == (0, 0)
+        for (x1, y1), (x2, y2) in zip(steps, steps[1:]):
+            assert abs(x1 - x2) + abs(y1 - y2) == 1
+    assert len(maze.solve_breadth_first()) == distances[13 * 16 + 13] + 1
+
+
+def test_get_maze_renders_every_cell():
+    maze = RandomMaze(9, 7, seed=1)
+    maze.generate_maze('prim')
+    rows = maze.get_maze()
+    assert len(rows) == 7 and all(len(row) == 9 for row in rows)
+
+
+def test_get_maze_array_is_a_read_only_view():
+    pytest.importorskip("numpy")
+    maze = RandomMaze(9, 7, seed=1)
+    maze.generate_maze('prim')
+    view = maze.get_maze(as_array=True)
+    assert view.shape == (7, 9)
+    assert bytes(view.tobytes()) == bytes(maze.walls)
+    with pytest.raises(ValueError):
+        view[0, 0] = 0
+    maze.walls[3] ^= EAST
+    assert view[0, 3] == maze.walls[3]
+
+
+@pytest.mark.parametrize('method', ['iterative', 'fast', 'growing_tree', 'prim', 'hunt_and_kill', 'kruskal',
+                                    'wilson'])
+def test_masked_mazes_fill_the_shape(method):
+    maze = RandomMaze(15, 11, seed=3, mask=ring_mask())
+    maze.generate_maze(method)
+    for y, row in enumerate(RING):
+        for x, value in enumerate(row):
+            assert maze.outside[y * 15 + x] == (value != '1')
+    assert reached(maze) == cells(maze)
+    if method != 'iterative':
+        assert passages(maze) == cells(maze) - 1
+
+
+# ------------------------------------------------
+# A wrapped maze is a spanning tree over the torus.
+# Every inside cell stores its north and east walls,
+# on the top row and last column those walls lead
+# across the edge to the other side.
+# ------------------------------------------------
+@pytest.mark.parametrize('method', [None, 'kruskal', 'wilson'])
+def test_wrapped_mazes_are_spanning_trees(method):
+    crossed = 0
+    for seed in range(30):
+        maze = RandomMaze(9, 7, seed=seed, wrap=True)
+        maze.generate_maze(method)
+        inside = [cell for cell in range(len(maze.walls)) if not maze.outside[cell]]
+        open_walls = sum(not maze.walls[cell] & NORTH for cell in inside)
+        open_walls += sum(not maze.walls[cell] & EAST for cell in inside)
+        assert open_walls == len(inside) - 1
+        assert reached(maze) == len(inside)
+        crossed += passages(maze) < open_walls
+    assert crossed > 0
+
+
+def test_wrapping_needs_a_supported_method():
+    for method in ('iterative', 'prim', 'eller'):
+        with pytest.raises(ValueError):
+            RandomMaze(9, 7, wrap=True).generate_maze(method)
+
+
+def test_mask_errors():
+    with pytest.raises(ValueError):
+        RandomMaze(15, 12, mask=ring_mask())
+    with pytest.raises(ValueError):
+        RandomMaze(15, 11, start_x=3, start_y=2, mask=ring_mask())
+    for method in RECTANGLE_METHODS:
+        with pytest.raises(ValueError):
+            RandomMaze(15, 11, mask=ring_mask()).generate_maze(method)
+
+
+def test_load_mask_reads_p1_and_p4(tmp_path):
+    width = len(RING[0])
+    text = tmp_path / 'ring.pbm'
+    text.write_text("P1\n# a ring\n%d %d\n%s\n" % (width, len(RING), '\n'.join(
+        ' '.join('1' if value == '1' else '0' for value in row) for row in RING)))
+
+    binary = tmp_path / 'ring_binary.pbm'
+    data = bytearray(b"P4\n%d %d\n" % (width, len(RING)))
+    for row in RING:
+        bits = ''.join('1' if value == '1' else '0' for value in row).ljust(16, '0')
+        data += int(bits, 2).to_bytes(2, 'big')
+    binary.write_bytes(bytes(data))
+
+    expected = [bytes(1 if value == '1' else 0 for value in row) for row in RING]
+    assert load_mask(str(text)) == expected
+    assert load_mask(str(binary)) == expected
+    assert RandomMaze(15, 11, seed=1, mask=str(binary)).outside == RandomMaze(15, 11, mask=ring_mask()).outside
+
+
+# ------------------------------------------------
+# Replays the carve events on a fresh grid, which must
+# give the same walls as the maze that sent them.
+# ------------------------------------------------
+@pytest.mark.parametrize('method', EVENT_METHODS)
+def test_carve_events_replay_the_maze(method):
+    maze = RandomMaze(13, 10, seed=5)
+    events = []
+    maze.generate_maze(method, on_carve=lambda x, y, direction: events.append((x, y, direction)))
+
+    replay = bytearray([NORTH | EAST]) * len(maze.walls)
+    for x, y, direction in events:
+        cell = y * 13 + x
+        if direction == N:
+            replay[cell] &= ~NORTH
+        elif direction == E:
+            replay[cell] &= ~EAST
+        elif direction == W:
+            replay[cell - 1] &= ~EAST
+        elif direction == S:
+            replay[cell + 13] &= ~NORTH
+    # The goal at 0, 0 gets its north wall opened when the endpoints are marked.
+    replay[0] &= ~NORTH
+    assert bytes(replay) == bytes(flags & (NORTH | EAST) for flags in maze.walls)
+
+
+def test_carve_events_need_a_supported_method():
+    with pytest.raises(ValueError):
+        RandomMaze(9, 9).generate_maze('eller', on_carve=print)
+
+
+def test_growing_tree_policies():
+    for policy in ('newest', 'random', 'oldest', 'mix', (1, 2, 3)):
+        maze = RandomMaze(12, 12, seed=2)
+        maze.generate_maze('growing_tree', policy=policy)
+        assert passages(maze) == cells(maze) - 1
+    for policy in ('abc', (1, 'a', 0), (0, 0, 0), None):
+        with pytest.raises(ValueError):
+            RandomMaze(12, 12).generate_maze('growing_tree', policy=policy)
+
+
+def test_braid_opens_dead_ends():
+    pytest.importorskip("numpy")
+    maze = RandomMaze(30, 20, seed=4)
+    maze.generate_maze('prim')
+    before = passages(maze)
+    removed = maze.braid(1.0)
+    assert removed > 0
+    assert passages(maze) == before + removed
+    assert reached(maze) == cells(maze)
+    before = passages(maze)
+    removed = maze.braid(0.3, mode='walls')
+    assert passages(maze) == before + removed
+
+
+def test_generate_many_matches_its_shape():
+    pytest.importorskip("numpy")
+    from random_maze import generate_many
+    mazes = generate_many(5, 9, 7, seed=1, method='kruskal', block_size=2)
+    assert mazes.shape == (5, 7, 9)
+    assert generate_many(0, 9, 7, seed=1).shape == (0, 7, 9)
+
+
+# The seeds follow the blocks and tiles, not the processes, so any number of workers gives the same mazes.
+@pytest.mark.parametrize('method', ['sidewinder', 'kruskal'])
+def test_generate_many_is_the_same_for_any_workers(method):
+    pytest.importorskip("numpy")
+    from random_maze import generate_many
+    alone = generate_many(7, 11, 9, seed=3, method=method, workers=1, block_size=3)
+    shared = generate_many(7, 11, 9, seed=3, method=method, workers=2, block_size=3)
+    assert (alone == shared).all()
+
+
+def test_generate_tiled_is_the_same_for_any_workers():
+    alone = RandomMaze(45, 33, seed=6)
+    shared = RandomMaze(45, 33, seed=6)
+    assert alone.generate_tiled(tile_size=10, workers=1) == shared.generate_tiled(tile_size=10, workers=2)
+
+
+@pytest.mark.parametrize('method', PERFECT_METHODS)
+def test_generate_tiled_is_one_perfect_maze(method):
+    skip_without_numpy(method)
+    maze = RandomMaze(40, 30, seed=9)
+    maze.generate_tiled(tile_size=8, workers=1, method=method)
+    assert passages(maze) == cells(maze) - 1
+    assert reached(maze) == cells(maze)
+
+
+def test_generate_tiled_checks_its_arguments():
+    assert sorted(PERFECT_METHODS) == sorted(PERFECT)
+    for tile_size in (0, -8):
+        with pytest.raises(ValueError):
+            RandomMaze(20, 20).generate_tiled(tile_size=tile_size, workers=1)
+    for method in ('iterative', 'recursive', 'labyrinth'):
+        with pytest.raises(ValueError):
+            RandomMaze(20, 20).generate_tiled(tile_size=8, workers=1, method=method)
+
+
+class Interrupted(Exception):
+    pass
+
+
+# ------------------------------------------------
+# Stops a generation right after its third checkpoint
+# and resumes it from the file, which must finish the
+# same maze as a run that was never interrupted.
+# ------------------------------------------------
+@pytest.mark.parametrize('method, policy, mask', [
+    ('iterative', 'newest', None),
+    ('fast', 'newest', None),
+    ('growing_tree', 'mix', None),
+    ('growing_tree', (2, 1, 1), None),
+    ('prim', 'newest', None),
+    ('prim', 'newest', ring_mask()),
+])
+def test_resume_finishes_an_interrupted_maze(method, policy, mask, tmp_path, monkeypatch):
+    size = (15, 11) if mask else (24, 18)
+    expected = RandomMaze(*size, seed=8, mask=mask)
+    expected.generate_maze(method, policy)
+
+    save = RandomMaze._save_checkpoint
+    saves = []
+
+    def interrupt(maze, state):
+        save(maze, state)
+        saves.append(state)
+        if len(saves) == 3:
+            raise Interrupted()
+
+    monkeypatch.setattr(RandomMaze, '_save_checkpoint', interrupt)
+    path = str(tmp_path / 'maze.checkpoint')
+    with pytest.raises(Interrupted):
+        RandomMaze(*size, seed=8, mask=mask).generate_maze(method, policy, checkpoint=path, checkpoint_every=10)
+
+    resumed = RandomMaze.resume(path, checkpoint_every=0)
+    assert len(saves) == 3
+    assert resumed.walls == expected.walls
+    assert resumed.outside == expected.outside